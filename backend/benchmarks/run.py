@@ -0,0 +1,304 @@
+"""Бенчмарки рекомендацій, імпорту та кешів на синтетичних каталогах.
+
+Запуск з директорії backend/:
+
+    python -m benchmarks.run --sizes 1000,10000,100000 --output bench.json
+
+Кожен розмір каталогу імпортується в окрему тимчасову БД; робоча
+db/urban_plants.db не змінюється. OpenAI клієнт замінено локальною
+заглушкою. Результат — JSON (stdout або --output).
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.stub_llm import install_stub_llm
+from benchmarks.synthetic import create_database, synthetic_requests, write_data_dir
+from src import config
+from src.ai.explanation_generator import (
+    explanation_memory_cache,
+    get_cache_key,
+    get_cached_explanations,
+)
+from src.database.connection import close_connection, get_connection
+from src.importer.import_plants import import_plants
+from src.importer.upsert_plants import upsert_plants
+from src.recommender.catalog import reload_catalog
+from src.recommender.engine import recommend_plants, result_cache
+from src.recommender.similar import SimilarityIndex
+
+# Версія формату JSON з результатами
+RESULTS_FORMAT = 1
+
+
+def summarize(samples_s: List[float]) -> Dict:
+    """Перцентилі тривалості в мілісекундах"""
+    ms = np.array(samples_s) * 1000.0
+    return {
+        "n": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+
+def bench_import(workdir: str, size: int, seed: int, workers: int) -> Dict:
+    """Повний імпорт у порожню БД та повторний (холостий) upsert"""
+    data_dir = os.path.join(workdir, "data")
+    rows = write_data_dir(data_dir, size, seed)
+
+    # Вивід імпортера — у stderr, щоб не змішувати його з JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        started = time.perf_counter()
+        import_plants(clear_existing=True, data_dir=data_dir)
+        import_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        upsert_plants(data_dir=data_dir, workers=workers)
+        upsert_s = time.perf_counter() - started
+
+    return {
+        "plants": size,
+        "rows": rows,
+        "import_s": round(import_s, 4),
+        "import_rows_per_s": round(rows / import_s),
+        "upsert_noop_s": round(upsert_s, 4),
+    }
+
+
+def bench_recommend(requests: List[Dict], repeats: int) -> Dict:
+    """Латентність recommend_plants без кешу відповідей та з ним"""
+    # Прогрів: завантаження каталогу та генерація пояснень для топ-3
+    for params in requests:
+        recommend_plants(**params)
+
+    uncached = []
+    for _ in range(repeats):
+        for params in requests:
+            result_cache.clear()
+            started = time.perf_counter()
+            recommend_plants(**params)
+            uncached.append(time.perf_counter() - started)
+
+    for params in requests:
+        recommend_plants(**params)
+
+    cached = []
+    for _ in range(repeats):
+        for params in requests:
+            started = time.perf_counter()
+            recommend_plants(**params)
+            cached.append(time.perf_counter() - started)
+
+    return {"uncached": summarize(uncached), "result_cache_hit": summarize(cached)}
+
+
+def bench_similar(queries: int, k: int, seed: int) -> Dict:
+    """Пошук схожих рослин: KD-дерево (точний та eps=0.5) проти повного перебору"""
+    catalog = reload_catalog()
+    started = time.perf_counter()
+    index = SimilarityIndex(catalog)
+    build_s = time.perf_counter() - started
+
+    vectors = index.vectors
+    rows = np.random.default_rng(seed).choice(len(catalog), min(queries, len(catalog)), replace=False)
+    result = {"build_s": round(build_s, 4)}
+
+    samples = []
+    for row in rows:
+        started = time.perf_counter()
+        diff = vectors - vectors[row]
+        np.argpartition(np.einsum("ij,ij->i", diff, diff), k)[:k + 1]
+        samples.append(time.perf_counter() - started)
+    result["brute_force"] = summarize(samples)
+
+    for name, eps in (("kd_tree", 0.0), ("kd_tree_eps_0_5", 0.5)):
+        samples = []
+        visited = 0
+
+        def accept(leaf_rows):
+            nonlocal visited
+            visited += len(leaf_rows)
+            return np.ones(len(leaf_rows), dtype=bool)
+
+        for row in rows:
+            started = time.perf_counter()
+            index.tree.query(vectors[row], k + 1, accept, eps)
+            samples.append(time.perf_counter() - started)
+        result[name] = {
+            **summarize(samples),
+            # Частка каталогу, відстані до якої рахувались на запит
+            "visited_fraction": round(visited / len(rows) / len(catalog), 5),
+        }
+    return result
+
+
+def bench_http(requests: List[Dict], total: int, concurrency: int, log_level: str) -> Dict:
+    """Пропускна здатність POST /recommend через локальний ASGI-клієнт"""
+    import httpx
+
+    from main import app
+
+    # main налаштовує логування за LOG_LEVEL — повертаємо рівень бенчмарку
+    logging.getLogger("src").setLevel(log_level)
+
+    async def run() -> Dict:
+        transport = httpx.ASGITransport(app=app)
+        latencies = []
+        statuses: Dict[int, int] = {}
+        counter = iter(range(total))
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def worker():
+                for i in counter:
+                    started = time.perf_counter()
+                    response = await client.post("/recommend", json=requests[i % len(requests)])
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        return {
+            "requests": total,
+            "concurrency": concurrency,
+            "elapsed_s": round(elapsed, 4),
+            "requests_per_s": round(total / elapsed, 1),
+            "status_counts": {str(code): n for code, n in sorted(statuses.items())},
+            "latency": summarize(latencies),
+        }
+
+    result_cache.clear()
+    return asyncio.run(run())
+
+
+def bench_explanation_cache(size: int, entries: int, lookups: int, batch: int, seed: int) -> Dict:
+    """Вартість пакетного пошуку в кеші пояснень (половина ключів — промахи)"""
+    rng = random.Random(seed)
+    params = synthetic_requests(64, seed)
+    plant_ids = [row[0] for row in get_connection().execute("SELECT id FROM plants")]
+
+    conn = get_connection()
+    rows = {}
+    while len(rows) < entries:
+        plant_id = rng.choice(plant_ids)
+        rows[get_cache_key(plant_id, rng.choice(params))] = plant_id
+    with conn:
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO plant_explanations_cache (plant_id, cache_key, explanation)
+            VALUES (?, ?, ?)
+            """,
+            [(plant_id, key, "Синтетичне пояснення.") for key, plant_id in rows.items()],
+        )
+    stored = list(rows.items())
+
+    samples = []
+    for _ in range(lookups):
+        keys = [(plant_id, key) for key, plant_id in rng.sample(stored, batch // 2)]
+        keys += [
+            (plant_id, get_cache_key(plant_id, {**rng.choice(params), "min_temp_c": 99}))
+            for plant_id in rng.sample(plant_ids, batch - len(keys))
+        ]
+        started = time.perf_counter()
+        get_cached_explanations(keys)
+        samples.append(time.perf_counter() - started)
+
+    return {"entries": entries, "batch": batch, "lookup": summarize(samples)}
+
+
+def bench_size(args, size: int) -> Dict:
+    with tempfile.TemporaryDirectory(prefix=f"urban-plants-bench-{size}-") as workdir:
+        config.DB_PATH = os.path.join(workdir, "bench.db")
+        create_database(config.DB_PATH)
+        # Тимчасові БД повторюють id рослин — кеші попереднього розміру
+        # дали б хибні влучання
+        explanation_memory_cache.clear()
+        result_cache.clear()
+        try:
+            result = {"size": size, "import": bench_import(workdir, size, args.seed, args.workers)}
+
+            reload_catalog()
+            result_cache.clear()
+            requests = synthetic_requests(args.distinct_requests, args.seed)
+            result["recommend"] = bench_recommend(requests, args.repeats)
+            if not args.skip_http:
+                result["http"] = bench_http(
+                    requests, args.http_requests, args.concurrency, args.log_level
+                )
+            result["similar"] = bench_similar(args.similar_queries, 10, args.seed)
+            result["explanation_cache"] = bench_explanation_cache(
+                size, args.cache_entries, args.cache_lookups, args.cache_batch, args.seed
+            )
+        finally:
+            close_connection()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run recommender benchmarks on synthetic catalogs")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--distinct-requests", type=int, default=50, help="different /recommend parameter sets")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the request set")
+    parser.add_argument("--http-requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-http", action="store_true", help="skip the ASGI throughput benchmark")
+    parser.add_argument("--similar-queries", type=int, default=200, help="similar-plant lookups per size")
+    parser.add_argument("--cache-entries", type=int, default=20000)
+    parser.add_argument("--cache-lookups", type=int, default=200)
+    parser.add_argument("--cache-batch", type=int, default=15)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="delay of the stub OpenAI client")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes for the upsert run")
+    parser.add_argument("--log-level", default="WARNING", help="level of application logs (stderr)")
+    parser.add_argument("-o", "--output", default="-", help="JSON output path ('-' for stdout)")
+    args = parser.parse_args()
+
+    # Вивід логів на кожен запит спотворює виміри
+    logging.getLogger("src").setLevel(args.log_level)
+    stub = install_stub_llm(args.llm_latency_ms / 1000.0)
+    db_path = config.DB_PATH
+    try:
+        results = [bench_size(args, int(size)) for size in args.sizes.split(",")]
+    finally:
+        config.DB_PATH = db_path
+
+    report = {
+        "format": RESULTS_FORMAT,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "recommender_mode": config.RECOMMENDER_MODE,
+        },
+        "options": {k: v for k, v in vars(args).items() if k != "output"},
+        "llm_stub_calls": stub.calls,
+        "results": results,
+    }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import time
+from types import SimpleNamespace
+
+from src.ai import explanation_generator
+from src.ai.explanation_backends import OpenAIBackend
+
+
+class StubOpenAI:
+    """Локальна заміна OpenAI клієнта: фіксована відповідь після затримки"""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        message = SimpleNamespace(content="Синтетичне пояснення для бенчмарку.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def install_stub_llm(latency_s: float = 0.0) -> StubOpenAI:
+    """Підміняє OpenAI клієнт backend-а пояснень на StubOpenAI"""
+    stub = StubOpenAI(latency_s)
+    if isinstance(explanation_generator.backend, OpenAIBackend):
+        explanation_generator.backend.client = stub
+    os.environ["OPENAI_API_KEY"] = "benchmark-stub"
+    return stub
@@ -0,0 +1,86 @@
+import json
+import os
+import random
+import sqlite3
+from typing import Dict, Iterator, List
+
+from src.recommender.catalog import LIGHT_LABELS
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "schema.sql")
+
+# Коди ґрунтів з довідника soil_types (db/schema.sql)
+SOIL_CODES = (
+    "chernozem",
+    "grey_forest",
+    "turf_podzolic",
+    "meadow",
+    "solonets",
+    "sandy",
+    "disturbed",
+)
+
+# Частка рослин без значення освітлення (NULL у plant_traits)
+MISSING_LIGHT_SHARE = 0.02
+
+
+def create_database(path: str):
+    """Створює порожню БД за db/schema.sql"""
+    conn = sqlite3.connect(path)
+    try:
+        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def synthetic_plants(n: int, seed: int = 0) -> Iterator[Dict]:
+    """Записи рослин у форматі JSON-файлів імпортера (схема plant_traits)"""
+    rng = random.Random(seed)
+    for i in range(n):
+        light = None if rng.random() < MISSING_LIGHT_SHARE else rng.choice(LIGHT_LABELS)
+        yield {
+            "scientific_name": f"Planta synthetica {i}",
+            "common_name_ua": f"Рослина {i}",
+            "image_url": None,
+            "cold_tolerance_c": rng.randrange(-40, 6),
+            "drought_tolerance": rng.randint(1, 5),
+            "light_requirement": light,
+            "biodiversity_support": rng.randint(1, 5),
+            "growth_rate": rng.randint(1, 5),
+            "recovery_speed": rng.randint(1, 5),
+            "soil_tolerance": rng.sample(SOIL_CODES, rng.randint(1, 4)),
+        }
+
+
+def write_data_dir(path: str, n: int, seed: int = 0, files: int = 4) -> int:
+    """Записує n синтетичних рослин у кілька JSON-файлів, повертає кількість рядків БД"""
+    os.makedirs(path, exist_ok=True)
+    plants = list(synthetic_plants(n, seed))
+    per_file = -(-n // files) if n else 0
+    for k in range(files):
+        chunk = plants[k * per_file:(k + 1) * per_file]
+        if not chunk:
+            break
+        with open(os.path.join(path, f"synthetic_{k:02d}.json"), "w", encoding="utf-8") as f:
+            json.dump(chunk, f, ensure_ascii=False)
+    # plants + plant_traits + plant_soil_tolerance
+    return sum(2 + len(plant["soil_tolerance"]) for plant in plants)
+
+
+def synthetic_requests(n: int, seed: int = 0) -> List[Dict]:
+    """Параметри запитів /recommend у діапазонах слайдерів фронтенду"""
+    rng = random.Random(seed)
+    return [
+        {
+            "soil_code": rng.choice(SOIL_CODES),
+            "min_temp_c": rng.choice((-35, -30, -25, -20, -15, -10)),
+            "drought": rng.randint(1, 5),
+            "light": rng.choice(LIGHT_LABELS),
+            "biodiversity": rng.randint(1, 5),
+            "growth": rng.randint(1, 5),
+            "recovery": rng.randint(1, 5),
+            "limit": 15,
+        }
+        for _ in range(n)
+    ]
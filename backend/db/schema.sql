@@ -50,8 +50,13 @@ CREATE TABLE IF NOT EXISTS plant_traits (
     FOREIGN KEY (plant_id) REFERENCES plants(id) ON DELETE CASCADE
 );
 
-CREATE INDEX IF NOT EXISTS idx_traits_cold
-    ON plant_traits (cold_tolerance_c);
+-- Покривний індекс для завантаження каталогу: рядки читаються в порядку
+-- (cold_tolerance_c, plant_id) без звернень до самої таблиці
+CREATE INDEX IF NOT EXISTS idx_traits_cover
+    ON plant_traits (
+        cold_tolerance_c, plant_id, drought_tolerance, light_requirement,
+        biodiversity_support, growth_rate, recovery_speed
+    );
 CREATE INDEX IF NOT EXISTS idx_traits_drought
     ON plant_traits (drought_tolerance);
 CREATE INDEX IF NOT EXISTS idx_traits_recovery
@@ -69,6 +74,10 @@ CREATE TABLE IF NOT EXISTS plant_soil_tolerance (
     FOREIGN KEY (soil_code) REFERENCES soil_types(code) ON DELETE RESTRICT
 );
 
+-- Рослини для заданого ґрунту (та перевірка зовнішнього ключа soil_code)
+CREATE INDEX IF NOT EXISTS idx_soil_tolerance_soil
+    ON plant_soil_tolerance (soil_code, plant_id, tolerance_level);
+
 ------------------------------------------------------------
 -- 5. Кеш AI-пояснень
 ------------------------------------------------------------
@@ -85,3 +94,14 @@ CREATE INDEX IF NOT EXISTS idx_explanations_cache_key
     ON plant_explanations_cache(cache_key);
 CREATE INDEX IF NOT EXISTS idx_explanations_plant_id 
     ON plant_explanations_cache(plant_id);
+-- Видалення найстаріших пояснень (src/ai/compact_explanations.py)
+CREATE INDEX IF NOT EXISTS idx_explanations_created_at
+    ON plant_explanations_cache(created_at);
+
+------------------------------------------------------------
+-- 6. Службові метадані (версія каталогу для інвалідації кешів)
+------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
@@ -1,6 +1,9 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Annotated, Optional
 import os
+import time
 
 # Завантаження змінних оточення з .env файлу
 try:
@@ -11,8 +14,81 @@ try:
 except ImportError:
     pass
 
-from src.models.request_models import RecommendRequest
-from src.recommender.engine import recommend_plants
+from src.ai.explanation_generator import backend as explanation_backend
+from src.ai.explanation_generator import explanation_memory_cache, explanation_queue
+from src.config import (
+    BATCH_MAX_SITES,
+    EXPLANATION_CACHE_KEY_STRATEGY,
+    RECOMMEND_CACHE_MAX_AGE_S,
+)
+from src.database.catalog_version import get_response_versions
+from src.models.response_models import (
+    FastJSONResponse,
+    cache_control,
+    dumps_line,
+    etag_matches,
+    project,
+    response_etag,
+    shape,
+    shape_results,
+    validate_shape,
+)
+from src.models.request_models import (
+    BatchRecommendRequest,
+    PlanRequest,
+    RecommendRequest,
+    StreamRecommendRequest,
+)
+from src.observability.logs import configure_logging
+from src.observability.metrics import REGISTRY
+from src.recommender.engine import (
+    preload,
+    recommend_plants_status,
+    recommend_plants_batch,
+    result_cache,
+    stream_recommendations,
+)
+from src.recommender.planner import PLAN_MAX_SPECIES, plan_site
+from src.recommender.profiles import DEFAULT_PROFILE, PROFILES, get_profile
+from src.recommender.similar import SIMILAR_MAX_K, get_similarity_index, similar_plants
+
+configure_logging()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "urban_plants_http_requests_total",
+    "HTTP requests by route and status",
+    labels=("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "urban_plants_http_request_seconds",
+    "HTTP request duration until the response starts",
+    labels=("route",),
+)
+REGISTRY.gauge(
+    "urban_plants_result_cache_entries",
+    "Responses held in the /recommend result cache",
+    lambda: result_cache.stats()["size"],
+)
+REGISTRY.gauge(
+    "urban_plants_result_cache_hit_rate",
+    "Hit rate of the /recommend result cache",
+    lambda: result_cache.stats()["hit_rate"],
+)
+REGISTRY.gauge(
+    "urban_plants_explanation_memory_cache_hit_rate",
+    "Hit rate of the in-process explanation cache tier",
+    lambda: explanation_memory_cache.stats()["hit_rate"],
+)
+REGISTRY.gauge(
+    "urban_plants_explanation_queue_depth",
+    "Explanations waiting for a generation worker",
+    lambda: explanation_queue.stats()["queue_depth"],
+)
+REGISTRY.gauge(
+    "urban_plants_explanation_queue_in_flight",
+    "Explanations queued or being generated",
+    lambda: explanation_queue.stats()["in_flight"],
+)
 
 app = FastAPI(
     title="Urban Plant Recommender API",
@@ -20,6 +96,9 @@ app = FastAPI(
     description="API для підбору рослин для міського озеленення",
 )
 
+# Налаштування процесу, від яких залежить відповідь /recommend (входять в ETag)
+RESPONSE_CONFIG = (app.version, explanation_backend.name, EXPLANATION_CACHE_KEY_STRATEGY)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -27,9 +106,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # ETag доступний фронтенду для запитів з If-None-Match
+    expose_headers=["ETag"],
 )
 
 
+@app.on_event("startup")
+def preload_worker():
+    # Кожен воркер uvicorn прогрівається до того, як почне приймати запити
+    get_similarity_index(preload())
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Шаблон маршруту замість фактичного шляху — обмежена кількість міток
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+    HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    return response
+
+
 @app.get("/")
 def root():
     return {
@@ -38,6 +136,15 @@ def root():
         "endpoints": {
             "health": "/health",
             "recommend": "/recommend",
+            "recommend_batch": "/recommend/batch",
+            "recommend_stream": "/recommend/stream",
+            "plan": "/plan",
+            "profiles": "/profiles",
+            "similar_plants": "/plants/{plant_id}/similar",
+            "explanation_queue": "/explanations/queue",
+            "explanation_cache": "/explanations/cache",
+            "result_cache": "/recommend/cache",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -48,10 +155,68 @@ def health_check():
     return {"status": "ok"}
 
 
-@app.post("/recommend")
-def recommend(req: RecommendRequest):
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/explanations/queue")
+def explanation_queue_stats():
+    return explanation_queue.stats()
+
+
+@app.get("/explanations/cache")
+def explanation_cache_stats():
+    return explanation_memory_cache.stats()
+
+
+@app.get("/profiles")
+def scoring_profiles():
+    return {
+        "default": DEFAULT_PROFILE.name,
+        "profiles": [profile.to_dict() for profile in PROFILES.values()],
+    }
+
+
+def check_profile(name):
+    if name is not None and name not in PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown scoring profile {name!r}, expected one of {', '.join(PROFILES)}",
+        )
+
+
+def check_shape(fields, response_format):
+    error = validate_shape(fields, response_format)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+
+@app.get("/recommend/cache")
+def result_cache_stats():
+    return result_cache.stats()
+
+
+def recommend_response(req: RecommendRequest, request: Request):
+    check_profile(req.profile)
+    check_shape(req.fields, req.format)
+
+    # Відповідь однозначно визначається версіями каталогу й кешу пояснень,
+    # конфігурацією процесу та нормалізованим запитом. Версії читаються до
+    # підрахунку: пояснення, збережене під час запиту, змінить ETag наступних
+    versions = get_response_versions()
+    etag = response_etag(
+        versions,
+        RESPONSE_CONFIG,
+        get_profile(req.profile).to_dict(),
+        dict(req),
+    )
+    headers = {"ETag": etag, "Cache-Control": cache_control(RECOMMEND_CACHE_MAX_AGE_S)}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
     try:
-        results = recommend_plants(
+        results, explanations_pending = recommend_plants_status(
             soil_code=req.soil_code,
             min_temp_c=req.min_temp_c,
             drought=req.drought,
@@ -60,9 +225,137 @@ def recommend(req: RecommendRequest):
             growth=req.growth,
             recovery=req.recovery,
             limit=req.limit,
+            strict=req.strict,
+            profile=req.profile,
+            # Відповідь з кешу береться для тих самих версій, що й ETag
+            versions=versions,
         )
     except Exception as e:
     
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {"results": results}
+    if explanations_pending:
+        # Тимчасові прості пояснення не мають осідати в кешах браузера чи
+        # proxy; без ETag клієнт не отримає на них 304
+        headers = {"Cache-Control": "no-store"}
+
+    # Готова відповідь оминає jsonable_encoder FastAPI — результати вже JSON-сумісні
+    return FastJSONResponse(shape_results(results, req.fields, req.format), headers=headers)
+
+
+@app.post("/recommend", response_class=FastJSONResponse)
+def recommend(req: RecommendRequest, request: Request):
+    return recommend_response(req, request)
+
+
+@app.get("/recommend", response_class=FastJSONResponse)
+def recommend_get(request: Request, req: Annotated[RecommendRequest, Query()]):
+    # Той самий запит у query-рядку: GET кешують браузер і reverse proxy
+    return recommend_response(req, request)
+
+
+@app.post("/recommend/batch", response_class=FastJSONResponse)
+def recommend_batch(req: BatchRecommendRequest):
+    if len(req.sites) > BATCH_MAX_SITES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many sites in one batch (max {BATCH_MAX_SITES})",
+        )
+    for site in req.sites:
+        check_profile(site.profile)
+        check_shape(site.fields, site.format)
+
+    try:
+        # fields / format стосуються лише відповіді, а не підбору
+        results = recommend_plants_batch([
+            {name: value for name, value in dict(site).items() if name not in ("fields", "format")}
+            for site in req.sites
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return FastJSONResponse({
+        "results": [
+            shape(site_results, site.fields, site.format)
+            for site, site_results in zip(req.sites, results)
+        ]
+    })
+
+
+@app.post("/recommend/stream")
+def recommend_stream(req: StreamRecommendRequest):
+    check_profile(req.profile)
+    check_shape(req.fields, req.format)
+    if req.format != "records":
+        raise HTTPException(status_code=400, detail="/recommend/stream supports only format=records")
+    try:
+        results = stream_recommendations(
+            soil_code=req.soil_code,
+            min_temp_c=req.min_temp_c,
+            drought=req.drought,
+            light=req.light,
+            biodiversity=req.biodiversity,
+            growth=req.growth,
+            recovery=req.recovery,
+            limit=None if req.all_candidates else req.limit,
+            strict=req.strict,
+            profile=req.profile,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Один JSON-об'єкт на рядок (NDJSON)
+    lines = (dumps_line(project(result, req.fields)) for result in results)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@app.post("/plan")
+def plan(req: PlanRequest):
+    if not 1 <= req.species <= PLAN_MAX_SPECIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"species must be between 1 and {PLAN_MAX_SPECIES}",
+        )
+    if not 0.0 <= req.diversity <= 1.0:
+        raise HTTPException(status_code=400, detail="diversity must be between 0 and 1")
+    check_profile(req.profile)
+
+    try:
+        return plan_site(
+            soil_code=req.soil_code,
+            min_temp_c=req.min_temp_c,
+            drought=req.drought,
+            light=req.light,
+            biodiversity=req.biodiversity,
+            growth=req.growth,
+            recovery=req.recovery,
+            species=req.species,
+            diversity=req.diversity,
+            cover_light=req.cover_light,
+            profile=req.profile,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/plants/{plant_id}/similar")
+def plant_similar(
+    plant_id: int,
+    k: int = 10,
+    min_temp_c: Optional[float] = None,
+    soil_code: Optional[str] = None,
+    eps: float = 0.0,
+):
+    if not 1 <= k <= SIMILAR_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {SIMILAR_MAX_K}")
+    if eps < 0:
+        raise HTTPException(status_code=400, detail="eps must be non-negative")
+
+    try:
+        result = similar_plants(plant_id, k, min_temp_c, soil_code, eps)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Plant {plant_id} not found")
+    return result
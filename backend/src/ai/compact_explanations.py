@@ -0,0 +1,22 @@
+import argparse
+
+from src.ai.explanation_cache import compact_explanation_cache
+from src.config import EXPLANATION_CACHE_MAX_AGE_DAYS, EXPLANATION_CACHE_MAX_ROWS
+from src.database.connection import get_connection
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evict old explanations from plant_explanations_cache")
+    parser.add_argument("--max-rows", type=int, default=EXPLANATION_CACHE_MAX_ROWS, help="0 = unlimited")
+    parser.add_argument("--max-age-days", type=float, default=EXPLANATION_CACHE_MAX_AGE_DAYS, help="0 = unlimited")
+    parser.add_argument("--vacuum", action="store_true", help="return freed pages to the filesystem")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    removed = compact_explanation_cache(conn, args.max_rows, args.max_age_days)
+    (rows,) = conn.execute("SELECT COUNT(*) FROM plant_explanations_cache").fetchone()
+    if args.vacuum:
+        conn.execute("VACUUM")
+    print(
+        f"Removed {removed['expired']} expired and {removed['overflow']} overflow explanations; "
+        f"{rows} remain."
+    )
@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.config import EXPLANATION_BATCH_SIZE, EXPLANATION_MODEL
+from src.observability.metrics import REGISTRY, span
+
+# Опціональний імпорт OpenAI
+try:
+    from openai import OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+    OpenAI = None
+
+logger = logging.getLogger(__name__)
+
+# Виклики OpenAI API за результатом (ok, rate_limited, auth_error, bad_response, error)
+LLM_CALLS = REGISTRY.counter(
+    "urban_plants_llm_calls_total",
+    "OpenAI API calls by outcome",
+    labels=("outcome",),
+)
+
+SYSTEM_PROMPT = "Ти експерт з екології та озеленення України."
+
+# Пара (дані рослини, параметри запиту) — одне пояснення
+ExplanationRequest = Tuple[Dict, Dict]
+
+LIGHT_UA = {
+    "full_sun": "відкрите сонце",
+    "partial_shade": "напівтінь",
+    "shade": "тінь",
+}
+
+
+def build_prompt(plant_data: Dict, params: Dict) -> str:
+    """Створює промпт для AI"""
+    return f"""Ти експерт з екології та озеленення України.
+
+Рослина: {plant_data['scientific_name']} ({plant_data['common_name_ua']})
+Характеристики:
+- Морозостійкість: {plant_data['cold_tolerance_c']}°C
+- Посухостійкість: {plant_data['drought_tolerance']}/5
+- Освітлення: {plant_data['light_requirement']}
+- Підтримка біорізноманіття: {plant_data['biodiversity_support']}/5
+- Швидкість росту: {plant_data['growth_rate']}/5
+- Швидкість відновлення: {plant_data['recovery_speed']}/5
+- Тип ґрунту: {params['soil_code']}
+
+Параметри запиту користувача:
+- Мінімальна температура: {params['min_temp_c']}°C
+- Тип ґрунту: {params['soil_code']}
+- Посухостійкість: {params['drought']}
+- Освітлення: {params['light']}
+- Підтримка біорізноманіття: {params['biodiversity']}
+- Швидкість росту: {params['growth']}
+- Швидкість відновлення: {params['recovery']}
+
+Напиши ОДИН зв'язний текст українською мовою (2-3 речення бажано, але якщо потрібно більше для повного опису - пиши більше, не обрізай речення), який включає:
+1. Чому ця рослина обрана (початок тексту)
+2. В яких регіонах України вона найкраще росте (включити природно в текст, наприклад: "Найкраще росте в регіонах Полісся та Лісостепу...")
+3. Як вона допомагає відновити території після військових дій (середина тексту)
+4. Як вона покращує біорізноманіття (кінець тексту)
+
+Текст має бути природним, зв'язним та інформативним. Максимум 2-3 речення."""
+
+
+def build_batch_prompt(requests: List[ExplanationRequest]) -> str:
+    """Один промпт для кількох рослин; відповідь — JSON-масив текстів у тому ж порядку"""
+    parts = [
+        f"### Рослина {n}\n{build_prompt(plant_data, params)}"
+        for n, (plant_data, params) in enumerate(requests, start=1)
+    ]
+    return (
+        "\n\n".join(parts)
+        + f"\n\nПоверни лише JSON-масив з {len(requests)} рядків: "
+        "пояснення для кожної рослини в тому ж порядку, без іншого тексту."
+    )
+
+
+class ExplanationBackend:
+    """Генератор пояснень: отримує пакет запитів, повертає тексти (None — не вдалося)"""
+
+    name = "base"
+    # Скільки пояснень передається в один виклик generate
+    batch_size = 1
+    # Чи зберігати результати в кеші пояснень (SQLite)
+    cacheable = True
+
+    def unavailable_reason(self) -> Optional[str]:
+        """Чому backend не може генерувати пояснення (None — може)"""
+        return None
+
+    def prepare(self):
+        """Підготовка при старті воркера (клієнти, з'єднання)"""
+
+    def generate(self, requests: List[ExplanationRequest]) -> List[Optional[str]]:
+        raise NotImplementedError
+
+
+class TemplateBackend(ExplanationBackend):
+    """Локальні пояснення з шаблону: без мережі та з нульовою затримкою.
+
+    Результати не кешуються в БД — їх дешевше згенерувати знову, і вони
+    не витіснять AI-пояснення після перемикання на OpenAI.
+    """
+
+    name = "template"
+    batch_size = 64
+    cacheable = False
+
+    def generate(self, requests: List[ExplanationRequest]) -> List[Optional[str]]:
+        return [self.render(plant_data, params) for plant_data, params in requests]
+
+    @staticmethod
+    def render(plant_data: Dict, params: Dict) -> str:
+        name = plant_data.get("common_name_ua") or plant_data["scientific_name"]
+        sentences = [
+            f"{name} ({plant_data['scientific_name']}) витримує морози до "
+            f"{plant_data['cold_tolerance_c']:g}°C, тож підходить для ділянок з мінімальною "
+            f"температурою {params['min_temp_c']:g}°C."
+        ]
+
+        light = plant_data.get("light_requirement")
+        drought = plant_data.get("drought_tolerance")
+        if light or drought is not None:
+            details = []
+            if light:
+                details.append(f"любить {LIGHT_UA.get(light, light)}")
+            if drought is not None:
+                details.append(f"має посухостійкість {drought}/5")
+            sentences.append(f"Рослина {' і '.join(details)}.")
+
+        recovery = plant_data.get("recovery_speed")
+        biodiversity = plant_data.get("biodiversity_support")
+        if recovery is not None and recovery >= 4:
+            sentences.append("Швидко відновлюється, тому добре підходить для пошкоджених територій.")
+        if biodiversity is not None and biodiversity >= 4:
+            sentences.append("Підтримує біорізноманіття: дає корм і прихисток комахам та птахам.")
+        return " ".join(sentences)
+
+
+class OpenAIBackend(ExplanationBackend):
+    """Одне пояснення на виклик OpenAI Chat Completions"""
+
+    name = "openai"
+
+    def __init__(self, model: str = EXPLANATION_MODEL):
+        self.model = model
+        self.client = None
+        self._client_lock = threading.Lock()
+
+    def unavailable_reason(self) -> Optional[str]:
+        if not OPENAI_AVAILABLE and self.client is None:
+            return "OpenAI бібліотека не встановлена. Встановіть: pip install openai"
+        if not os.getenv("OPENAI_API_KEY"):
+            return "OPENAI_API_KEY не встановлено. Встановіть змінну оточення: export OPENAI_API_KEY=your_key"
+        return None
+
+    def prepare(self):
+        self.init_client()
+
+    def init_client(self) -> bool:
+        """Ініціалізує OpenAI клієнт з API ключа"""
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return False
+        with self._client_lock:
+            if self.client:
+                return True
+            if not OPENAI_AVAILABLE:
+                return False
+            try:
+                self.client = OpenAI(api_key=api_key)
+                logger.info("OpenAI клієнт ініціалізовано")
+                return True
+            except Exception as e:
+                logger.error("Помилка ініціалізації OpenAI клієнта: %s", e)
+                return False
+
+    def generate(self, requests: List[ExplanationRequest]) -> List[Optional[str]]:
+        return [
+            self._complete(build_prompt(plant_data, params), max_tokens=500)
+            for plant_data, params in requests
+        ]
+
+    def _complete(self, prompt: str, max_tokens: int) -> Optional[str]:
+        """Один виклик API; помилки логуються та рахуються в LLM_CALLS"""
+        if not self.client and not self.init_client():
+            logger.error("Не вдалося ініціалізувати OpenAI клієнт")
+            return None
+
+        try:
+            logger.debug("Відправляємо запит до OpenAI API")
+            with span("llm_call"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=max_tokens  # Збільшено для повних пояснень без обрізання
+                )
+            LLM_CALLS.inc(outcome="ok")
+            logger.debug("Отримано відповідь від OpenAI")
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            error_type = type(e).__name__
+            error_msg = str(e)
+
+            if "RateLimitError" in error_type or "429" in error_msg or "quota" in error_msg.lower():
+                LLM_CALLS.inc(outcome="rate_limited")
+                logger.error("Перевищено квоту OpenAI. Перевірте ваш план та billing на https://platform.openai.com/account/billing")
+            elif "AuthenticationError" in error_type or "401" in error_msg:
+                LLM_CALLS.inc(outcome="auth_error")
+                logger.error("Неправильний API ключ. Перевірте OPENAI_API_KEY в .env файлі")
+            else:
+                LLM_CALLS.inc(outcome="error")
+                logger.error("Помилка генерації AI-пояснення: %s: %s", error_type, error_msg)
+            return None
+
+
+class BatchedOpenAIBackend(OpenAIBackend):
+    """Кілька пояснень за один виклик OpenAI (відповідь — JSON-масив)"""
+
+    name = "openai_batch"
+
+    def __init__(self, model: str = EXPLANATION_MODEL, batch_size: int = EXPLANATION_BATCH_SIZE):
+        super().__init__(model)
+        self.batch_size = max(1, batch_size)
+
+    def generate(self, requests: List[ExplanationRequest]) -> List[Optional[str]]:
+        if len(requests) == 1:
+            return super().generate(requests)
+
+        content = self._complete(build_batch_prompt(requests), max_tokens=500 * len(requests))
+        explanations = _parse_batch(content, len(requests)) if content else None
+        if explanations is None:
+            if content:
+                LLM_CALLS.inc(outcome="bad_response")
+                logger.warning("Некоректна відповідь на пакетний запит, пояснення не збережено")
+            return [None] * len(requests)
+        return explanations
+
+
+def _parse_batch(content: str, expected: int) -> Optional[List[Optional[str]]]:
+    # Модель іноді загортає JSON у блок коду
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("["):]
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list) or len(items) != expected:
+        return None
+    return [item.strip() if isinstance(item, str) and item.strip() else None for item in items]
+
+
+BACKENDS = {
+    TemplateBackend.name: TemplateBackend,
+    OpenAIBackend.name: OpenAIBackend,
+    BatchedOpenAIBackend.name: BatchedOpenAIBackend,
+}
+
+
+def create_backend(name: str) -> ExplanationBackend:
+    """Backend за назвою з EXPLANATION_BACKEND"""
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown EXPLANATION_BACKEND={name!r}, expected one of {', '.join(BACKENDS)}"
+        )
+    return BACKENDS[name]()
@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.database.catalog_version import bump_explanations_version
+
+ExplanationKey = Tuple[int, str]
+
+
+class ExplanationMemoryCache:
+    """LRU-кеш AI-пояснень у пам'яті процесу перед таблицею plant_explanations_cache.
+
+    Зберігаються лише знайдені пояснення: промах завжди перевіряється
+    в SQLite, бо пояснення могло з'явитися з іншого воркера.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[ExplanationKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[ExplanationKey]) -> Dict[ExplanationKey, str]:
+        """Знайдені в пам'яті пояснення для keys"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                explanation = self._entries.get(key)
+                if explanation is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = explanation
+                self.hits += 1
+        return found
+
+    def put_many(self, items: Dict[ExplanationKey, str]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for key, explanation in items.items():
+                self._entries[key] = explanation
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+def compact_explanation_cache(
+    conn: sqlite3.Connection, max_rows: int, max_age_days: Optional[float]
+) -> Dict[str, int]:
+    """Обмежує таблицю plant_explanations_cache за віком і кількістю рядків.
+
+    Спершу видаляються записи, старші за max_age_days (None або 0 — без
+    обмеження), потім найстаріші понад max_rows (0 — без обмеження).
+    """
+    expired = 0
+    overflow = 0
+    with conn:
+        if max_age_days:
+            expired = conn.execute(
+                """
+                DELETE FROM plant_explanations_cache
+                WHERE created_at < datetime('now', ?)
+                """,
+                (f"-{max_age_days} days",),
+            ).rowcount
+        if max_rows:
+            # Лишаються max_rows найновіших записів
+            overflow = conn.execute(
+                """
+                DELETE FROM plant_explanations_cache
+                WHERE id IN (
+                    SELECT id FROM plant_explanations_cache
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_rows,),
+            ).rowcount
+        if expired or overflow:
+            bump_explanations_version(conn)
+    return {"expired": expired, "overflow": overflow}
@@ -1,8 +1,26 @@
 import hashlib
-import sqlite3
+import logging
+import math
 import os
-from typing import Optional, Dict
-import asyncio
+from typing import Optional, Dict, List, Tuple
+import threading
+from concurrent.futures import Future, wait
+
+from src.ai.explanation_backends import ExplanationBackend, create_backend
+from src.ai.explanation_cache import ExplanationMemoryCache, compact_explanation_cache
+from src.ai.explanation_queue import ExplanationQueue
+from src.config import (
+    EXPLANATION_BACKEND,
+    EXPLANATION_CACHE_COMPACT_EVERY,
+    EXPLANATION_CACHE_KEY_STRATEGY,
+    EXPLANATION_CACHE_MAX_AGE_DAYS,
+    EXPLANATION_CACHE_MAX_ROWS,
+    EXPLANATION_MEMORY_CACHE_SIZE,
+    EXPLANATION_WORKERS,
+)
+from src.database.catalog_version import bump_explanations_version
+from src.database.connection import get_connection
+from src.observability.metrics import span
 
 # Завантаження змінних оточення з .env файлу
 try:
@@ -14,188 +32,227 @@ except ImportError:
     # python-dotenv не встановлено, використовуємо тільки системні змінні
     pass
 
-# Опціональний імпорт OpenAI
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
-
-# Шлях до БД (відносно backend/ директорії)
-DB_PATH = "db/urban_plants.db"
-
-# Ініціалізація OpenAI клієнта
-client = None
-
-def init_openai_client():
-    """Ініціалізує OpenAI клієнт з API ключа"""
-    global client
-    if not OPENAI_AVAILABLE:
-        return False
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        try:
-            client = OpenAI(api_key=api_key)
-            return True
-        except Exception as e:
-            print(f"Помилка ініціалізації OpenAI клієнта: {e}")
-            return False
-    return False
-
-def get_cache_key(plant_id: int, params: Dict) -> str:
-    """Створює унікальний ключ для кешу на основі параметрів запиту"""
-    # Нормалізуємо параметри для консистентності ключа
-    # min_temp_c може бути float, тому перетворюємо на int для унікальності
-    min_temp = int(params['min_temp_c'])
-    
-    key_str = (
-        f"{plant_id}_{params['soil_code']}_{min_temp}_"
-        f"{params['drought']}_{params['light']}_{params['biodiversity']}_"
-        f"{params['growth']}_{params['recovery']}"
+logger = logging.getLogger(__name__)
+
+# Попередження про конфігурацію пишуться один раз на процес, а не на кожну рослину
+_config_warnings = set()
+
+def _warn_once(message: str):
+    if message not in _config_warnings:
+        _config_warnings.add(message)
+        logger.warning(message)
+
+# Стратегії ключа кешу пояснень (EXPLANATION_CACHE_KEY_STRATEGY)
+CACHE_KEY_STRATEGIES = ("exact", "bucketed", "plant_soil_light")
+if EXPLANATION_CACHE_KEY_STRATEGY not in CACHE_KEY_STRATEGIES:
+    raise ValueError(
+        f"Unknown EXPLANATION_CACHE_KEY_STRATEGY={EXPLANATION_CACHE_KEY_STRATEGY!r}, "
+        f"expected one of {', '.join(CACHE_KEY_STRATEGIES)}"
     )
+
+# Ширина температурного кошика для стратегії "bucketed" (°C)
+TEMPERATURE_BUCKET_C = 10
+
+# Максимальна кількість ключів в одному SELECT ... IN (...)
+CACHE_LOOKUP_BATCH = 500
+
+# Генератор пояснень (EXPLANATION_BACKEND)
+backend: ExplanationBackend = create_backend(EXPLANATION_BACKEND)
+
+# Перший рівень кешу пояснень — пам'ять процесу, другий — SQLite
+explanation_memory_cache = ExplanationMemoryCache(EXPLANATION_MEMORY_CACHE_SIZE)
+
+# Кількість збережених пояснень з моменту останнього ущільнення таблиці
+_writes_since_compaction = 0
+_compaction_lock = threading.Lock()
+
+def _slider_bucket(value: int) -> str:
+    if value <= 2:
+        return "low"
+    if value == 3:
+        return "mid"
+    return "high"
+
+def get_cache_key(plant_id: int, params: Dict, strategy: Optional[str] = None) -> str:
+    """Створює ключ для кешу на основі параметрів запиту.
+
+    Стратегія (за замовчуванням EXPLANATION_CACHE_KEY_STRATEGY) визначає,
+    для яких близьких запитів пояснення буде спільним.
+    """
+    strategy = strategy or EXPLANATION_CACHE_KEY_STRATEGY
+
+    if strategy == "plant_soil_light":
+        key_str = f"psl_{plant_id}_{params['soil_code']}_{params['light']}"
+    elif strategy == "bucketed":
+        temp_bucket = math.floor(params['min_temp_c'] / TEMPERATURE_BUCKET_C) * TEMPERATURE_BUCKET_C
+        key_str = (
+            f"bucketed_{plant_id}_{params['soil_code']}_{temp_bucket}_"
+            f"{_slider_bucket(params['drought'])}_{params['light']}_"
+            f"{_slider_bucket(params['biodiversity'])}_{_slider_bucket(params['growth'])}_"
+            f"{_slider_bucket(params['recovery'])}"
+        )
+    else:
+        # Нормалізуємо параметри для консистентності ключа
+        # min_temp_c може бути float, тому перетворюємо на int для унікальності
+        min_temp = int(params['min_temp_c'])
+        
+        key_str = (
+            f"{plant_id}_{params['soil_code']}_{min_temp}_"
+            f"{params['drought']}_{params['light']}_{params['biodiversity']}_"
+            f"{params['growth']}_{params['recovery']}"
+        )
     return hashlib.md5(key_str.encode()).hexdigest()
 
 def get_cached_explanation(plant_id: int, cache_key: str) -> Optional[str]:
-    """Перевіряє кеш в БД та повертає збережене пояснення"""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
-    cur.execute(
-        """
-        SELECT explanation 
-        FROM plant_explanations_cache 
-        WHERE plant_id = ? AND cache_key = ?
-        """,
-        (plant_id, cache_key)
-    )
-    
-    result = cur.fetchone()
-    conn.close()
-    
-    return result[0] if result else None
+    """Перевіряє кеш (пам'ять, потім БД) та повертає збережене пояснення"""
+    return get_cached_explanations([(plant_id, cache_key)]).get((plant_id, cache_key))
+
+def get_cached_explanations(keys: List[Tuple[int, str]]) -> Dict[Tuple[int, str], str]:
+    """Перевіряє кеш для списку пар (plant_id, cache_key).
+
+    Спершу — пам'ять процесу, відсутні ключі — одним з'єднанням з БД
+    (знайдені там пояснення додаються в пам'ять). Повертає словник
+    лише зі знайденими поясненнями.
+    """
+    if not keys:
+        return {}
+
+    found = explanation_memory_cache.get_many(set(keys))
+    wanted = set(keys) - found.keys()
+    if not wanted:
+        return found
+
+    from_db: Dict[Tuple[int, str], str] = {}
+    cur = get_connection().cursor()
+
+    # Обмеження SQLite на кількість параметрів у запиті
+    cache_keys = sorted({cache_key for _, cache_key in wanted})
+    with span("explanation_cache_lookup"):
+        for start in range(0, len(cache_keys), CACHE_LOOKUP_BATCH):
+            chunk = cache_keys[start:start + CACHE_LOOKUP_BATCH]
+            cur.execute(
+                f"""
+                SELECT plant_id, cache_key, explanation
+                FROM plant_explanations_cache
+                WHERE cache_key IN ({", ".join("?" * len(chunk))})
+                """,
+                chunk
+            )
+            for plant_id, cache_key, explanation in cur.fetchall():
+                if (plant_id, cache_key) in wanted:
+                    from_db[(plant_id, cache_key)] = explanation
+
+    explanation_memory_cache.put_many(from_db)
+    found.update(from_db)
+    return found
 
 def cache_explanation(plant_id: int, cache_key: str, explanation: str):
-    """Зберігає пояснення в кеш"""
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    """Зберігає пояснення в кеш (БД та пам'ять процесу)"""
+    global _writes_since_compaction
+    conn = get_connection()
     
-    cur.execute(
-        """
-        INSERT OR REPLACE INTO plant_explanations_cache 
-        (plant_id, cache_key, explanation)
-        VALUES (?, ?, ?)
-        """,
-        (plant_id, cache_key, explanation)
+    with conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO plant_explanations_cache 
+            (plant_id, cache_key, explanation)
+            VALUES (?, ?, ?)
+            """,
+            (plant_id, cache_key, explanation)
+        )
+        bump_explanations_version(conn)
+    explanation_memory_cache.put_many({(plant_id, cache_key): explanation})
+
+    # Періодичне ущільнення тримає таблицю в межах EXPLANATION_CACHE_MAX_*
+    with _compaction_lock:
+        _writes_since_compaction += 1
+        due = 0 < EXPLANATION_CACHE_COMPACT_EVERY <= _writes_since_compaction
+        if due:
+            _writes_since_compaction = 0
+    if due:
+        removed = compact_explanation_cache(
+            conn, EXPLANATION_CACHE_MAX_ROWS, EXPLANATION_CACHE_MAX_AGE_DAYS
+        )
+        logger.info(
+            "Ущільнення кешу пояснень: %d застарілих, %d понад ліміт",
+            removed["expired"], removed["overflow"],
+        )
+
+def generate_and_cache_explanations(requests: List[Tuple[Dict, Dict]]) -> List[Optional[str]]:
+    """Генерує пояснення для пакета (дані рослини, параметри) через backend.
+
+    Пояснення, що вже є в кеші (на випадок паралельних запитів), не
+    генеруються повторно. Повертає тексти в порядку запитів (None — не вдалося).
+    """
+    keys = [(plant_data['id'], get_cache_key(plant_data['id'], params)) for plant_data, params in requests]
+    cached = get_cached_explanations(keys) if backend.cacheable else {}
+    results: List[Optional[str]] = [cached.get(key) for key in keys]
+
+    todo = [n for n, explanation in enumerate(results) if explanation is None]
+    if not todo:
+        return results
+
+    reason = backend.unavailable_reason()
+    if reason:
+        _warn_once(reason)
+        return results
+
+    logger.info(
+        "Генеруємо %d пояснень (%s) для рослин %s",
+        len(todo), backend.name, [keys[n][0] for n in todo],
     )
-    
-    conn.commit()
-    conn.close()
-
-def build_prompt(plant_data: Dict, params: Dict) -> str:
-    """Створює промпт для AI"""
-    return f"""Ти експерт з екології та озеленення України.
-
-Рослина: {plant_data['scientific_name']} ({plant_data['common_name_ua']})
-Характеристики:
-- Морозостійкість: {plant_data['cold_tolerance_c']}°C
-- Посухостійкість: {plant_data['drought_tolerance']}/5
-- Освітлення: {plant_data['light_requirement']}
-- Підтримка біорізноманіття: {plant_data['biodiversity_support']}/5
-- Швидкість росту: {plant_data['growth_rate']}/5
-- Швидкість відновлення: {plant_data['recovery_speed']}/5
-- Тип ґрунту: {params['soil_code']}
-
-Параметри запиту користувача:
-- Мінімальна температура: {params['min_temp_c']}°C
-- Тип ґрунту: {params['soil_code']}
-- Посухостійкість: {params['drought']}
-- Освітлення: {params['light']}
-- Підтримка біорізноманіття: {params['biodiversity']}
-- Швидкість росту: {params['growth']}
-- Швидкість відновлення: {params['recovery']}
-
-Напиши ОДИН зв'язний текст українською мовою (2-3 речення бажано, але якщо потрібно більше для повного опису - пиши більше, не обрізай речення), який включає:
-1. Чому ця рослина обрана (початок тексту)
-2. В яких регіонах України вона найкраще росте (включити природно в текст, наприклад: "Найкраще росте в регіонах Полісся та Лісостепу...")
-3. Як вона допомагає відновити території після військових дій (середина тексту)
-4. Як вона покращує біорізноманіття (кінець тексту)
-
-Текст має бути природним, зв'язним та інформативним. Максимум 2-3 речення."""
-
-async def generate_ai_explanation(plant_data: Dict, params: Dict) -> Optional[str]:
-    """Генерує AI-пояснення через OpenAI API"""
-    if not OPENAI_AVAILABLE:
-        print(f"[AI] OpenAI не доступний")
-        return None
-    if not client:
-        print(f"[AI] Ініціалізуємо OpenAI клієнт...")
-        if not init_openai_client():
-            print(f"[AI] ❌ Не вдалося ініціалізувати OpenAI клієнт")
-            return None
-        print(f"[AI] ✅ OpenAI клієнт ініціалізовано")
-    
+    for start in range(0, len(todo), backend.batch_size):
+        chunk = todo[start:start + backend.batch_size]
+        generated = backend.generate([requests[n] for n in chunk])
+        for n, explanation in zip(chunk, generated):
+            plant_id, cache_key = keys[n]
+            if not explanation:
+                logger.warning("Не вдалося згенерувати пояснення для рослини %d", plant_id)
+                continue
+            results[n] = explanation
+            if backend.cacheable:
+                cache_explanation(plant_id, cache_key, explanation)
+                logger.debug("Пояснення збережено в кеш для рослини %d: %s...", plant_id, explanation[:100])
+
+    return results
+
+def generate_and_cache_explanation(plant_data: Dict, params: Dict) -> Optional[str]:
+    """Генерує та зберігає AI-пояснення, повертає його (або None)"""
+    return generate_and_cache_explanations([(plant_data, params)])[0]
+
+def _generate_safely(requests: List[Tuple[Dict, Dict]]) -> List[Optional[str]]:
     try:
-        prompt = build_prompt(plant_data, params)
-        print(f"[AI] Відправляємо запит до OpenAI API...")
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Ти експерт з екології та озеленення України."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500  # Збільшено для повних пояснень без обрізання
-        )
-        
-        explanation = response.choices[0].message.content.strip()
-        print(f"[AI] ✅ Отримано відповідь від OpenAI")
-        return explanation
+        return generate_and_cache_explanations(requests)
     except Exception as e:
-        error_type = type(e).__name__
-        error_msg = str(e)
-        
-        if "RateLimitError" in error_type or "429" in error_msg or "quota" in error_msg.lower():
-            print(f"[AI] ❌ Перевищено квоту OpenAI. Перевірте ваш план та billing на https://platform.openai.com/account/billing")
-        elif "AuthenticationError" in error_type or "401" in error_msg:
-            print(f"[AI] ❌ Неправильний API ключ. Перевірте OPENAI_API_KEY в .env файлі")
-        else:
-            print(f"[AI] ❌ Помилка генерації AI-пояснення: {error_type}: {error_msg}")
-        
-        return None
+        logger.exception("Помилка генерації AI-пояснення: %s: %s", type(e).__name__, e)
+        return [None] * len(requests)
 
-async def generate_and_cache_explanation(plant_data: Dict, params: Dict):
-    """Асинхронно генерує та зберігає AI-пояснення"""
-    plant_id = plant_data['id']
-    cache_key = get_cache_key(plant_id, params)
-    
-    print(f"[AI] Перевірка кешу для рослини {plant_id} ({plant_data.get('scientific_name', 'N/A')})...")
-    
-    # Перевіряємо, чи вже є в кеші (на випадок паралельних запитів)
-    if get_cached_explanation(plant_id, cache_key):
-        print(f"[AI] ✅ Пояснення вже є в кеші для рослини {plant_id}")
-        return
-    
-    if not OPENAI_AVAILABLE:
-        print(f"[AI] ❌ OpenAI бібліотека не встановлена. Встановіть: pip install openai")
-        return
-    
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print(f"[AI] ❌ OPENAI_API_KEY не встановлено. Встановіть змінну оточення: export OPENAI_API_KEY=your_key")
-        return
-    
-    print(f"[AI] 🔄 Генеруємо AI-пояснення для рослини {plant_id}...")
-    
-    # Генеруємо пояснення
-    explanation = await generate_ai_explanation(plant_data, params)
-    
-    if explanation:
-        # Зберігаємо в кеш
-        cache_explanation(plant_id, cache_key, explanation)
-        print(f"[AI] ✅ Пояснення збережено в кеш для рослини {plant_id}")
-        print(f"[AI] Пояснення (перші 100 символів): {explanation[:100]}...")
-    else:
-        print(f"[AI] ❌ Не вдалося згенерувати пояснення для рослини {plant_id}")
+# Черга генерації: синхронний OpenAI клієнт не блокує воркер FastAPI,
+# кілька пояснень генеруються паралельно, а однакові ключі об'єднуються
+explanation_queue = ExplanationQueue(EXPLANATION_WORKERS, _generate_safely, backend.batch_size)
+
+def submit_explanation(plant_data: Dict, params: Dict) -> Future:
+    """Ставить генерацію пояснення в чергу (або приєднується до активної)"""
+    cache_key = get_cache_key(plant_data['id'], params)
+    return explanation_queue.submit(cache_key, plant_data, params)
+
+def generate_explanations(
+    plants: List[Dict], params: Dict, timeout: float
+) -> Tuple[Dict[int, str], List[int]]:
+    """Паралельно генерує пояснення для рослин, чекаючи не довше timeout секунд.
+
+    Повертає пояснення, готові до дедлайну (plant_id -> текст), та id
+    рослин, генерація для яких ще триває у фоні (результат потрапить у кеш).
+    """
+    futures = {submit_explanation(plant, params): plant['id'] for plant in plants}
+    done, pending = wait(futures, timeout=max(timeout, 0))
+
+    if pending:
+        logger.info("Дедлайн %ss: %d пояснень генеруються у фоні", timeout, len(pending))
 
+    explanations = {}
+    for future in done:
+        explanation = future.result()
+        if explanation:
+            explanations[futures[future]] = explanation
+    return explanations, [futures[future] for future in pending]
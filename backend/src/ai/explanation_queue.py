@@ -0,0 +1,106 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ExplanationQueue:
+    """Черга генерації AI-пояснень з фіксованою кількістю воркерів.
+
+    Задачі з однаковим cache_key об'єднуються (single-flight): поки
+    пояснення генерується, повторні запити отримують той самий Future
+    замість нового виклику OpenAI API. Воркер забирає з черги до
+    batch_size задач і передає їх у generate одним пакетом.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        generate: Callable[[List[Tuple[Dict, Dict]]], List[Optional[str]]],
+        batch_size: int = 1,
+    ):
+        self._generate = generate
+        self._workers = max(1, workers)
+        self._batch_size = max(1, batch_size)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self._submitted = 0
+        self._coalesced = 0
+
+    def submit(self, cache_key: str, plant_data: Dict, params: Dict) -> Future:
+        """Ставить генерацію в чергу або повертає вже активну задачу з тим самим ключем"""
+        with self._lock:
+            future = self._in_flight.get(cache_key)
+            if future is not None:
+                self._coalesced += 1
+                return future
+
+            future = Future()
+            self._in_flight[cache_key] = future
+            self._submitted += 1
+            self._start_workers()
+
+        self._queue.put((cache_key, plant_data, params, future))
+        return future
+
+    def stats(self) -> Dict:
+        """Глибина черги, кількість задач у роботі та лічильники"""
+        with self._lock:
+            return {
+                "workers": self._workers,
+                "batch_size": self._batch_size,
+                "queue_depth": self._queue.qsize(),
+                "in_flight": len(self._in_flight),
+                "running": self._running,
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+            }
+
+    def _start_workers(self):
+        # Воркери стартують ліниво при першій задачі (викликається під self._lock)
+        if self._threads:
+            return
+        for i in range(self._workers):
+            thread = threading.Thread(
+                target=self._work,
+                name=f"ai-explanations-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_batch(self) -> list:
+        # Чекаємо першу задачу, решту пакета забираємо без очікування
+        batch = [self._queue.get()]
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            with self._lock:
+                self._running += len(batch)
+            try:
+                live = [task for task in batch if task[3].set_running_or_notify_cancel()]
+                if live:
+                    try:
+                        results = self._generate([(plant_data, params) for _, plant_data, params, _ in live])
+                        for (_, _, _, future), result in zip(live, results):
+                            future.set_result(result)
+                    except Exception as e:
+                        for _, _, _, future in live:
+                            future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._running -= len(batch)
+                    for cache_key, _, _, _ in batch:
+                        self._in_flight.pop(cache_key, None)
+                for _ in batch:
+                    self._queue.task_done()
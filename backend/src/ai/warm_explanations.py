@@ -0,0 +1,165 @@
+import argparse
+import itertools
+import time
+from collections import Counter
+from concurrent.futures import wait
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.ai.explanation_generator import (
+    backend,
+    get_cache_key,
+    get_cached_explanations,
+    submit_explanation,
+)
+from src.config import EXPLANATION_CACHE_KEY_STRATEGY
+from src.database.connection import get_connection
+from src.recommender.catalog import LIGHT_LABELS, PlantCatalog, reload_catalog
+from src.recommender.engine import rank_site_group
+from src.recommender.precomputed import SLIDER_MAX, SLIDER_MIN
+
+# Скільки рослин з топу отримують AI-пояснення в /recommend
+EXPLAINED_TOP = 3
+# Крок температур сітки: користувачі вводять круглі значення (-20, -25, -30)
+DEFAULT_TEMPERATURE_STEP_C = 5
+
+
+def request_temperatures(catalog: PlantCatalog, step: int = DEFAULT_TEMPERATURE_STEP_C) -> List[float]:
+    """Круглі температури (кратні step) у діапазоні морозостійкості каталогу"""
+    if not len(catalog):
+        return []
+    low = int(np.floor(catalog.cold.min() / step)) * step
+    high = int(np.ceil(catalog.cold.max() / step)) * step
+    return [float(t) for t in range(low, high + 1, step)]
+
+
+def observed_plant_demand() -> Counter:
+    """Скільки пояснень кожної рослини вже запитано (рядки кешу пояснень)"""
+    rows = get_connection().execute(
+        "SELECT plant_id, COUNT(*) FROM plant_explanations_cache GROUP BY plant_id"
+    ).fetchall()
+    return Counter(dict(rows))
+
+
+def grid_sites(
+    soil_codes: List[str], lights: List[str], temperatures: List[float]
+) -> List[Dict]:
+    """Усі комбінації параметрів запиту на сітці слайдерів"""
+    sliders = range(SLIDER_MIN, SLIDER_MAX + 1)
+    return [
+        {
+            "soil_code": soil_code,
+            "min_temp_c": temperature,
+            "drought": drought,
+            "light": light,
+            "biodiversity": biodiversity,
+            "growth": growth,
+            "recovery": recovery,
+            "limit": EXPLAINED_TOP,
+        }
+        for soil_code, light, temperature in itertools.product(soil_codes, lights, temperatures)
+        for drought, biodiversity, growth, recovery in itertools.product(sliders, repeat=4)
+    ]
+
+
+def warm_explanations(
+    max_explanations: int,
+    temperature_step: int = DEFAULT_TEMPERATURE_STEP_C,
+    soil_codes: Optional[List[str]] = None,
+    lights: Optional[List[str]] = None,
+    timeout: Optional[float] = None,
+    temperatures: Optional[List[float]] = None,
+):
+    """Генерує пояснення, яких бракує для найчастіше запитуваних рослин.
+
+    Для кожної точки сітки (круглі температури, як їх вводять користувачі)
+    рахується топ-3, як у /recommend. Ключі кешу пояснень (за поточною
+    стратегією) сортуються за реальним попитом на рослину — кількістю її
+    пояснень, уже запитаних через API, — далі за тим, як часто рослина
+    потрапляє в топ для того самого ґрунту й освітлення, потім загалом
+    і за частотою самого ключа. Генеруються перші max_explanations.
+    """
+    if not backend.cacheable:
+        print(
+            f"Backend {backend.name} does not cache explanations, nothing to warm "
+            f"(set EXPLANATION_BACKEND=openai or openai_batch)"
+        )
+        return
+    if EXPLANATION_CACHE_KEY_STRATEGY == "exact":
+        print(
+            "Warning: the exact key strategy keys every slider value and whole degree, "
+            "so warmed explanations only match requests with exactly these parameters; "
+            "bucketed or plant_soil_light make warming far more effective"
+        )
+
+    started = time.perf_counter()
+    catalog = reload_catalog()
+    soil_codes = soil_codes or catalog.soil_codes
+    lights = lights or LIGHT_LABELS
+    temperatures = temperatures or request_temperatures(catalog, temperature_step)
+    sites = grid_sites(soil_codes, lights, temperatures)
+
+    groups: Dict[tuple, List[Dict]] = {}
+    for site in sites:
+        groups.setdefault(
+            (site["soil_code"], catalog.count_min_temp(site["min_temp_c"])), []
+        ).append(site)
+
+    demand: Counter = Counter()
+    plant_demand: Counter = Counter()
+    plant_site_demand: Counter = Counter()
+    requests = {}
+    for (soil_code, count), members in groups.items():
+        for site, top in zip(members, rank_site_group(catalog, soil_code, count, members)):
+            params = {name: value for name, value in site.items() if name != "limit"}
+            for i in top:
+                plant = catalog.plant(i)
+                key = (plant["id"], get_cache_key(plant["id"], params))
+                demand[key] += 1
+                plant_demand[plant["id"]] += 1
+                plant_site_demand[(plant["id"], soil_code, site["light"])] += 1
+                requests.setdefault(key, (plant, params))
+
+    observed = observed_plant_demand()
+
+    def priority(key):
+        plant_id = key[0]
+        params = requests[key][1]
+        return (
+            -observed[plant_id],
+            -plant_site_demand[(plant_id, params["soil_code"], params["light"])],
+            -plant_demand[plant_id],
+            -demand[key],
+            key,
+        )
+
+    ranked = sorted(demand, key=priority)
+    cached = get_cached_explanations(ranked)
+    todo = [key for key in ranked if key not in cached][:max_explanations]
+    print(
+        f"Strategy {EXPLANATION_CACHE_KEY_STRATEGY}: {len(sites)} grid points, "
+        f"{len(ranked)} distinct explanations, {len(cached)} cached, generating {len(todo)}"
+    )
+
+    futures = [submit_explanation(*requests[key]) for key in todo]
+    done, pending = wait(futures, timeout=timeout)
+    generated = sum(1 for future in done if future.result())
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Warmed {generated}/{len(todo)} explanations in {elapsed:.1f}s"
+        + (f", {len(pending)} still running" if pending else "")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate explanations for the most common top-3 plants")
+    parser.add_argument("--max", type=int, default=200, help="maximum explanations to generate")
+    parser.add_argument("--temp-step", type=int, default=DEFAULT_TEMPERATURE_STEP_C, help="grid temperature step, °C")
+    parser.add_argument("--temp", type=float, action="append", help="grid temperature instead of the stepped range (repeatable)")
+    parser.add_argument("--soil", action="append", help="restrict to soil code (repeatable)")
+    parser.add_argument("--light", action="append", choices=LIGHT_LABELS, help="restrict to light (repeatable)")
+    args = parser.parse_args()
+
+    warm_explanations(args.max, args.temp_step, args.soil, args.light, temperatures=args.temp)
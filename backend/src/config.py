@@ -0,0 +1,78 @@
+import os
+
+# Завантаження змінних оточення з .env файлу
+try:
+    from dotenv import load_dotenv
+    # Завантажуємо .env файл з кореня проекту (на рівень вище backend/)
+    env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
+    load_dotenv(env_path)
+except ImportError:
+    # python-dotenv не встановлено, використовуємо тільки системні змінні
+    pass
+
+# Шлях до БД (відносно backend/ директорії)
+DB_PATH = os.getenv("URBAN_PLANTS_DB", "db/urban_plants.db")
+
+# Скільки секунд /recommend чекає на AI-пояснення для топ-3 рослин.
+# Після дедлайну повертається просте пояснення, а генерація
+# завершується у фоні та потрапляє в кеш.
+EXPLANATION_DEADLINE_S = float(os.getenv("EXPLANATION_DEADLINE_S", "4.0"))
+
+# Кількість потоків для паралельної генерації AI-пояснень
+EXPLANATION_WORKERS = int(os.getenv("EXPLANATION_WORKERS", "4"))
+
+# Генератор пояснень: "openai" — один виклик API на рослину,
+# "openai_batch" — до EXPLANATION_BATCH_SIZE рослин за виклик,
+# "template" — локальний шаблон без мережі (офлайн-розгортання)
+EXPLANATION_BACKEND = os.getenv("EXPLANATION_BACKEND", "openai")
+EXPLANATION_MODEL = os.getenv("EXPLANATION_MODEL", "gpt-3.5-turbo")
+EXPLANATION_BATCH_SIZE = int(os.getenv("EXPLANATION_BATCH_SIZE", "5"))
+
+# Ключ кешу AI-пояснень: "exact" — усі параметри запиту, "bucketed" —
+# слайдери згруповані (1–2, 3, 4–5), температура — кошиками по 10°C,
+# "plant_soil_light" — лише рослина, ґрунт та освітлення
+EXPLANATION_CACHE_KEY_STRATEGY = os.getenv("EXPLANATION_CACHE_KEY_STRATEGY", "exact")
+
+# Кеш AI-пояснень: кількість записів у пам'яті кожного процесу та межі
+# таблиці plant_explanations_cache (0 — без обмеження). Ущільнення таблиці
+# запускається автоматично після кожних EXPLANATION_CACHE_COMPACT_EVERY
+# збережених пояснень або командою python -m src.ai.compact_explanations
+EXPLANATION_MEMORY_CACHE_SIZE = int(os.getenv("EXPLANATION_MEMORY_CACHE_SIZE", "4096"))
+EXPLANATION_CACHE_MAX_ROWS = int(os.getenv("EXPLANATION_CACHE_MAX_ROWS", "100000"))
+EXPLANATION_CACHE_MAX_AGE_DAYS = float(os.getenv("EXPLANATION_CACHE_MAX_AGE_DAYS", "365"))
+EXPLANATION_CACHE_COMPACT_EVERY = int(os.getenv("EXPLANATION_CACHE_COMPACT_EVERY", "1000"))
+
+# Кеш відповідей /recommend: максимальна кількість записів та час життя (с)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "600"))
+
+# HTTP-кешування /recommend: max-age у Cache-Control (с) для браузера та
+# reverse proxy; 0 — "no-cache" (клієнт щоразу перевіряє ETag, 304 без підрахунку)
+RECOMMEND_CACHE_MAX_AGE_S = int(os.getenv("RECOMMEND_CACHE_MAX_AGE_S", "60"))
+
+# Режим підбору: "live" — підрахунок score для всього каталогу,
+# "precomputed" — відповідь з таблиці src/importer/precompute_recommendations.py
+# (з автоматичним поверненням до "live", якщо таблиця не покриває запит)
+RECOMMENDER_MODE = os.getenv("RECOMMENDER_MODE", "live")
+PRECOMPUTED_TABLE_PATH = os.getenv("PRECOMPUTED_TABLE_PATH", "db/recommendations_grid.npz")
+
+# Джерело каталогу рослин у процесі: "sqlite" — завантаження з БД у кожному
+# процесі, "shared" — бінарний знімок CATALOG_SNAPSHOT_PATH, відкритий через
+# mmap і спільний для всіх воркерів (перебудовується, якщо відбиток БД змінився)
+CATALOG_SOURCE = os.getenv("CATALOG_SOURCE", "sqlite")
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "db/catalog_snapshot.bin")
+
+# Профілі підрахунку score: SCORING_PROFILE — профіль для запитів без
+# поля profile, SCORING_PROFILES_PATH — JSON-файл з додатковими профілями
+# ({"назва": {"weights": {...}, "light_scores": {...}, "soil_scores": {...}}})
+SCORING_PROFILE = os.getenv("SCORING_PROFILE", "default")
+SCORING_PROFILES_PATH = os.getenv("SCORING_PROFILES_PATH", "")
+
+# Максимальна кількість ділянок в одному запиті /recommend/batch
+BATCH_MAX_SITES = int(os.getenv("BATCH_MAX_SITES", "1000"))
+
+# Логування: рівень, формат ("text" або "json") та частка запитів,
+# для яких пишуться детальні (DEBUG/INFO) рядки по запиту
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
@@ -0,0 +1,69 @@
+import sqlite3
+from typing import Optional, Tuple
+
+from src.database.connection import get_connection
+
+# Лічильники версій зберігаються в БД, тому зміни, зроблені
+# іншим процесом (CLI імпорту, seed, інший воркер), бачать усі воркери API:
+#   catalog_version      — дані рослин (імпорт, seed)
+#   explanations_version — кеш AI-пояснень (запис нового пояснення, ущільнення)
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS catalog_meta (
+        key   TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+"""
+
+
+def get_catalog_version(conn: Optional[sqlite3.Connection] = None) -> int:
+    """Поточна версія каталогу (0, якщо каталог ще не змінювався)"""
+    conn = conn or get_connection()
+    try:
+        row = conn.execute(
+            "SELECT value FROM catalog_meta WHERE key = 'catalog_version'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Стара БД без таблиці catalog_meta
+        return 0
+    return row[0] if row else 0
+
+
+def get_response_versions(conn: Optional[sqlite3.Connection] = None) -> Tuple[int, int]:
+    """(catalog_version, explanations_version) одним запитом — від них залежить відповідь /recommend"""
+    conn = conn or get_connection()
+    try:
+        rows = dict(conn.execute(
+            """
+            SELECT key, value FROM catalog_meta
+            WHERE key IN ('catalog_version', 'explanations_version')
+            """
+        ).fetchall())
+    except sqlite3.OperationalError:
+        return 0, 0
+    return rows.get("catalog_version", 0), rows.get("explanations_version", 0)
+
+
+def _bump(conn: sqlite3.Connection, key: str):
+    conn.execute(CREATE_TABLE)
+    conn.execute(
+        """
+        INSERT INTO catalog_meta (key, value) VALUES (?, 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """,
+        (key,),
+    )
+
+
+def bump_catalog_version(conn: sqlite3.Connection) -> int:
+    """Збільшує версію каталогу в межах поточної транзакції conn"""
+    _bump(conn, "catalog_version")
+    return get_catalog_version(conn)
+
+
+def bump_explanations_version(conn: sqlite3.Connection):
+    """Збільшує версію кешу пояснень в межах поточної транзакції conn.
+
+    Окремий лічильник: новий запис у кеші пояснень змінює відповіді
+    /recommend, але не потребує перечитування каталогу.
+    """
+    _bump(conn, "explanations_version")
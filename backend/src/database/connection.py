@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+from typing import Optional
+
+from src import config
+
+# Налаштування кожного з'єднання:
+# - WAL дозволяє читачам не чекати на запис кешу пояснень чи імпорт
+# - synchronous=NORMAL у режимі WAL безпечний і значно дешевший за FULL
+# - mmap та більший page cache зменшують кількість системних викликів при читанні
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -32000",      # ~32 MB
+    "PRAGMA mmap_size = 268435456",    # 256 MB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Розмір кешу підготовлених запитів sqlite3 на з'єднання
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+
+
+def get_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """Повертає з'єднання поточного потоку (створює при першому зверненні).
+
+    З'єднання не потрібно закривати: воно живе разом з потоком і
+    перевикористовується, а разом з ним — кеш підготовлених запитів.
+    """
+    db_path = db_path or config.DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(
+            db_path,
+            timeout=5.0,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        connections[db_path] = conn
+    return conn
+
+
+def close_connection(db_path: Optional[str] = None):
+    """Закриває з'єднання поточного потоку (для CLI-скриптів)"""
+    db_path = db_path or config.DB_PATH
+    connections = getattr(_local, "connections", None) or {}
+    conn = connections.pop(db_path, None)
+    if conn is not None:
+        conn.close()
@@ -0,0 +1,44 @@
+import sqlite3
+from typing import Optional
+
+from src.database.connection import get_connection
+
+# Індекси з db/schema.sql, яких може не бути в БД, створених раніше
+INDEXES = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_traits_cover
+        ON plant_traits (
+            cold_tolerance_c, plant_id, drought_tolerance, light_requirement,
+            biodiversity_support, growth_rate, recovery_speed
+        )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_soil_tolerance_soil
+        ON plant_soil_tolerance (soil_code, plant_id, tolerance_level)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_explanations_created_at
+        ON plant_explanations_cache (created_at)
+    """,
+)
+
+# Індекси, які покриває idx_traits_cover
+OBSOLETE_INDEXES = ("idx_traits_cold",)
+
+
+def ensure_indexes(conn: Optional[sqlite3.Connection] = None):
+    """Приводить індекси до db/schema.sql (в межах поточної транзакції conn)"""
+    conn = conn or get_connection()
+    for name in OBSOLETE_INDEXES:
+        conn.execute(f'DROP INDEX IF EXISTS "{name}"')
+    for sql in INDEXES:
+        conn.execute(sql)
+
+
+if __name__ == "__main__":
+    conn = get_connection()
+    with conn:
+        ensure_indexes(conn)
+    # Оновлюємо статистику для планувальника запитів
+    conn.execute("ANALYZE")
+    print("Catalog indexes are up to date.")
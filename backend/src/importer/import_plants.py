@@ -1,81 +1,182 @@
-import json
-import sqlite3
 import os
+import time
+from typing import Dict, Iterable, Iterator, List
+
+from src.database.catalog_version import bump_catalog_version
+from src.database.connection import get_connection
+from src.database.indexes import ensure_indexes
+from src.importer.readers import is_data_file, iter_records
 
-DB_PATH = "db/urban_plants.db"
 DATA_DIR = "data"  # створюємл окрему папку для json-файлів
 
+# Кількість рослин в одному executemany
+BATCH_SIZE = 5000
+
+# Таблиці, індекси яких перебудовуються після завантаження
+INDEXED_TABLES = ("plants", "plant_traits", "plant_soil_tolerance")
+
+INSERT_PLANT = """
+    INSERT INTO plants (id, scientific_name, common_name_ua, image_url)
+    VALUES (?, ?, ?, ?)
+"""
+
+INSERT_TRAITS = """
+    INSERT INTO plant_traits (
+        plant_id, cold_tolerance_c, drought_tolerance,
+        light_requirement, biodiversity_support,
+        growth_rate, recovery_speed
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SOIL = """
+    INSERT INTO plant_soil_tolerance (plant_id, soil_code, tolerance_level)
+    VALUES (?, ?, ?)
+"""
+
+
+def iter_batches(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def next_plant_id(cur) -> int:
+    """Наступний id рослини з урахуванням AUTOINCREMENT.
+
+    id не перевикористовуються (як і при звичайному INSERT), щоб старі
+    записи кешу пояснень не прив'язались до інших рослин.
+    """
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM plants")
+    max_id = cur.fetchone()[0]
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'plants'")
+    row = cur.fetchone()
+    return max(max_id, row[0] if row else 0) + 1
+
+
+def insert_batch(cur, plants: List[Dict], first_id: int) -> int:
+    """Вставляє пакет рослин з явними id, повертає кількість вставлених рядків"""
+    plant_rows = []
+    trait_rows = []
+    soil_rows = []
+
+    for plant_id, plant in enumerate(plants, start=first_id):
+        plant_rows.append((
+            plant_id,
+            plant["scientific_name"],
+            plant["common_name_ua"],
+            plant.get("image_url"),  # Отримуємо image_url, якщо є
+        ))
+        trait_rows.append((
+            plant_id,
+            plant["cold_tolerance_c"],
+            plant["drought_tolerance"],
+            plant["light_requirement"],
+            plant["biodiversity_support"],
+            plant["growth_rate"],
+            plant["recovery_speed"],
+        ))
+        soil_rows.extend((plant_id, soil, 1) for soil in plant["soil_tolerance"])
+
+    cur.executemany(INSERT_PLANT, plant_rows)
+    cur.executemany(INSERT_TRAITS, trait_rows)
+    cur.executemany(INSERT_SOIL, soil_rows)
+    return len(plant_rows) + len(trait_rows) + len(soil_rows)
 
-def import_plants(clear_existing=False):
-    conn = sqlite3.connect(DB_PATH)
+
+def drop_indexes(cur) -> List[str]:
+    """Видаляє вторинні індекси таблиць каталогу, повертає їх CREATE INDEX"""
+    cur.execute(
+        f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL
+          AND tbl_name IN ({", ".join("?" * len(INDEXED_TABLES))})
+        """,
+        INDEXED_TABLES,
+    )
+    indexes = cur.fetchall()
+    for name, _ in indexes:
+        cur.execute(f'DROP INDEX "{name}"')
+    return [sql for _, sql in indexes]
+
+
+def import_plants(clear_existing=False, batch_size=BATCH_SIZE, data_dir=DATA_DIR):
+    conn = get_connection()
     cur = conn.cursor()
+    started = time.perf_counter()
+    total_plants = 0
+    total_rows = 0
+
+    # Весь імпорт — одна транзакція: при помилці БД лишається без змін
+    cur.execute("BEGIN")
+    try:
+        # Очищаємо існуючі дані про рослини (якщо потрібно)
+        if clear_existing:
+            print("Clearing existing plant data...")
+            cur.execute("DELETE FROM plant_soil_tolerance")
+            cur.execute("DELETE FROM plant_traits")
+            cur.execute("DELETE FROM plants")
+            print("Existing data cleared.")
+
+        # Індекси будуються один раз після завантаження, а не на кожен INSERT
+        ensure_indexes(conn)
+        index_sql = drop_indexes(cur)
+        plant_id = next_plant_id(cur)
+
+        files = sorted(f for f in os.listdir(data_dir) if is_data_file(f))
+
+        for filename in files:
+            path = os.path.join(data_dir, filename)
+            file_plants = 0
 
-    # Очищаємо існуючі дані про рослини (якщо потрібно)
-    if clear_existing:
-        print("Clearing existing plant data...")
-        cur.execute("DELETE FROM plant_soil_tolerance")
-        cur.execute("DELETE FROM plant_traits")
-        cur.execute("DELETE FROM plants")
+            for batch in iter_batches(iter_records(path), batch_size):
+                total_rows += insert_batch(cur, batch, plant_id)
+                plant_id += len(batch)
+                file_plants += len(batch)
+
+            total_plants += file_plants
+            print(f"Imported: {filename} ({file_plants} plants)")
+
+        for sql in index_sql:
+            cur.execute(sql)
+
+        # Нова версія каталогу інвалідує кеші рекомендацій у всіх воркерах
+        bump_catalog_version(conn)
         conn.commit()
-        print("Existing data cleared.")
-
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith(".json")]
-
-    for filename in files:
-        path = os.path.join(DATA_DIR, filename)
-
-        with open(path, "r", encoding="utf-8") as f:
-            plants = json.load(f)
-
-        for plant in plants:
-            scientific_name = plant["scientific_name"]
-            common_name_ua = plant["common_name_ua"]
-            image_url = plant.get("image_url")  # Отримуємо image_url, якщо є
-
-            cur.execute(
-                "INSERT INTO plants (scientific_name, common_name_ua, image_url) VALUES (?, ?, ?)",
-                (scientific_name, common_name_ua, image_url),
-            )
-            plant_id = cur.lastrowid
-
-            cur.execute(
-                """
-                INSERT INTO plant_traits (
-                    plant_id, cold_tolerance_c, drought_tolerance,
-                    light_requirement, biodiversity_support,
-                    growth_rate, recovery_speed
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    plant_id,
-                    plant["cold_tolerance_c"],
-                    plant["drought_tolerance"],
-                    plant["light_requirement"],
-                    plant["biodiversity_support"],
-                    plant["growth_rate"],
-                    plant["recovery_speed"],
-                ),
-            )
-
-            for soil in plant["soil_tolerance"]:
-                cur.execute(
-                    """
-                    INSERT INTO plant_soil_tolerance (plant_id, soil_code, tolerance_level)
-                    VALUES (?, ?, ?)
-                    """,
-                    (plant_id, soil, 1),
-                )
-
-        print(f"Imported: {filename}")
-
-    conn.commit()
-    conn.close()
-    print("Import completed.")
+    except BaseException:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Import completed: {total_plants} plants, {total_rows} rows in {elapsed:.2f}s "
+        f"({total_rows / elapsed if elapsed else 0:.0f} rows/s)"
+    )
 
 
 if __name__ == "__main__":
-    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import plant data from data/*.json")
     # Якщо передано аргумент --clear, очищаємо БД перед імпортом
-    clear = "--clear" in sys.argv or "-c" in sys.argv
-    import_plants(clear_existing=clear)
+    parser.add_argument("-c", "--clear", action="store_true", help="delete existing plants first")
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        help="idempotent import keyed on source_key / scientific_name",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="parser processes for --upsert")
+    args = parser.parse_args()
+
+    if args.upsert:
+        from src.importer.upsert_plants import upsert_plants
+        if args.clear:
+            parser.error("--upsert cannot be combined with --clear")
+        upsert_plants(workers=args.workers)
+    else:
+        import_plants(clear_existing=args.clear)
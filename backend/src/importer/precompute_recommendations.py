@@ -0,0 +1,101 @@
+import itertools
+import time
+
+import numpy as np
+
+from src import config
+from src.database.connection import get_connection
+from src.recommender.catalog import LIGHT_LABELS, PlantCatalog, reload_catalog
+from src.recommender.engine import score_catalog, select_top_k
+from src.recommender.profiles import get_profile
+from src.recommender.precomputed import (
+    SLIDER_MAX,
+    SLIDER_MIN,
+    PrecomputedTable,
+    temperature_buckets,
+)
+
+# Скільки рядків зберігати на комбінацію (має бути >= limit запитів)
+DEFAULT_TOP_N = 25
+# Максимальна кількість температурних кошиків
+DEFAULT_MAX_BUCKETS = 16
+
+
+def build_table(
+    catalog: PlantCatalog,
+    top_n: int = DEFAULT_TOP_N,
+    max_buckets: int = DEFAULT_MAX_BUCKETS,
+    profile: str = None,
+) -> PrecomputedTable:
+    """Рахує топ-N для кожної комбінації ґрунту, освітлення, слайдерів та кошика температури"""
+    profile = get_profile(profile).name
+    cur = get_connection().cursor()
+    cur.execute("SELECT code FROM soil_types")
+    soil_codes = sorted({code for (code,) in cur.fetchall()} | set(catalog.soil_codes))
+
+    boundaries = temperature_buckets(catalog, max_buckets)
+    prefixes = [catalog.count_min_temp(boundary) for boundary in boundaries]
+    sliders = list(range(SLIDER_MIN, SLIDER_MAX + 1))
+
+    shape = (len(boundaries), len(soil_codes), len(LIGHT_LABELS)) + (len(sliders),) * 4 + (top_n,)
+    rows = np.full(shape, -1, dtype=np.int32)
+
+    for soil_i, soil_code in enumerate(soil_codes):
+        for light_i, light in enumerate(LIGHT_LABELS):
+            for drought, biodiversity, growth, recovery in itertools.product(sliders, repeat=4):
+                # Один підрахунок на весь каталог, далі топ-N для кожного префікса
+                scores = score_catalog(
+                    catalog, soil_code, np.inf, drought, light, biodiversity, growth, recovery,
+                    profile,
+                )
+                cell = (soil_i, light_i, drought - SLIDER_MIN, biodiversity - SLIDER_MIN,
+                        growth - SLIDER_MIN, recovery - SLIDER_MIN)
+                for bucket, prefix in enumerate(prefixes):
+                    top = select_top_k(scores.total[:prefix], top_n)
+                    rows[(bucket,) + cell + (slice(0, len(top)),)] = top
+        print(f"Precomputed soil: {soil_code}")
+
+    return PrecomputedTable(
+        rows=rows,
+        boundaries=boundaries,
+        soil_codes=soil_codes,
+        light_labels=list(LIGHT_LABELS),
+        catalog_version=catalog.version,
+        n_plants=len(catalog),
+        profile=profile,
+    )
+
+
+def precompute_recommendations(
+    top_n: int = DEFAULT_TOP_N,
+    max_buckets: int = DEFAULT_MAX_BUCKETS,
+    path: str = None,
+    profile: str = None,
+):
+    path = path or config.PRECOMPUTED_TABLE_PATH
+    started = time.perf_counter()
+
+    catalog = reload_catalog()
+    table = build_table(catalog, top_n=top_n, max_buckets=max_buckets, profile=profile)
+    table.save(path)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Saved {path}: {table.rows.shape[0]} temperature buckets, "
+        f"{len(table.soil_codes)} soils, top {top_n}, profile {table.profile} "
+        f"({table.rows.nbytes / 1e6:.1f} MB) in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute recommendations for the full parameter grid")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--max-buckets", type=int, default=DEFAULT_MAX_BUCKETS)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--profile", default=None, help="scoring profile (default SCORING_PROFILE)")
+    args = parser.parse_args()
+    precompute_recommendations(
+        top_n=args.top_n, max_buckets=args.max_buckets, path=args.output, profile=args.profile
+    )
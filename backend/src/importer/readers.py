@@ -0,0 +1,111 @@
+import json
+from typing import Dict, IO, Iterator
+
+# Розмір блоку, що читається з файлу за раз
+CHUNK_SIZE = 1 << 16
+
+# Підтримувані формати файлів з даними
+JSON_EXTENSIONS = (".json",)
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+_WHITESPACE = " \t\n\r"
+
+
+def is_data_file(filename: str) -> bool:
+    return filename.endswith(JSON_EXTENSIONS + JSON_LINES_EXTENSIONS)
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """Потоково читає записи рослин з JSON-масиву або JSON Lines файлу"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(JSON_LINES_EXTENSIONS):
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_no}: {e}") from e
+        else:
+            yield from iter_json_array(f)
+
+
+def iter_json_array(f: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """Інкрементально розбирає JSON-масив об'єктів верхнього рівня.
+
+    У пам'яті тримається лише поточний блок файлу та один елемент масиву,
+    а не весь файл, як при json.load. Пошкоджений або обрізаний файл
+    (зайві чи пропущені коми, не-об'єкти, немає "]") дає ValueError.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    # "[" — очікується початок масиву, "first" — перший елемент або "]",
+    # "item" — елемент після коми, "next" — кома або "]", "done" — лише пробіли
+    expect = "["
+    index = 0
+
+    def read_more() -> bool:
+        nonlocal buf, pos, eof
+        more = f.read(chunk_size)
+        if not more:
+            eof = True
+            return False
+        buf, pos = buf[pos:] + more, 0
+        return True
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buf):
+            if read_more():
+                continue
+            if expect in ("done", "["):
+                # "[" тут — порожній файл без записів
+                return
+            raise ValueError("Unexpected end of JSON array")
+
+        char = buf[pos]
+        if expect == "[":
+            if char != "[":
+                raise ValueError("Expected a JSON array of plant records")
+            expect = "first"
+            pos += 1
+        elif expect == "done":
+            raise ValueError(f"Unexpected data after the JSON array: {buf[pos:pos + 20]!r}")
+        elif expect == "next":
+            if char == ",":
+                expect = "item"
+            elif char == "]":
+                expect = "done"
+            else:
+                raise ValueError(f"Expected ',' or ']' after array element {index - 1}")
+            pos += 1
+        elif char == "]" and expect == "first":
+            expect = "done"
+            pos += 1
+        elif char == ",":
+            raise ValueError(f"Unexpected ',' before array element {index}")
+        elif char == "]":
+            raise ValueError(f"Trailing ',' after array element {index - 1}")
+        elif char != "{":
+            raise ValueError(f"Array element {index} is not a JSON object")
+        else:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Елемент не вміщується в поточний блок — дочитуємо файл
+                if read_more():
+                    continue
+                raise
+            if end >= len(buf) and not eof and read_more():
+                # Значення закінчується разом з блоком — перевіряємо з продовженням
+                continue
+            yield item
+            index += 1
+            expect = "next"
+            pos = end
+            if pos >= chunk_size:
+                buf, pos = buf[pos:], 0
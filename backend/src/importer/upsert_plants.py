@@ -0,0 +1,251 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from src.database.catalog_version import bump_catalog_version
+from src.database.connection import get_connection
+from src.database.indexes import ensure_indexes
+from src.importer.import_plants import BATCH_SIZE, DATA_DIR, next_plant_id
+from src.importer.readers import is_data_file, iter_records
+
+REQUIRED_FIELDS = (
+    "scientific_name",
+    "common_name_ua",
+    "cold_tolerance_c",
+    "drought_tolerance",
+    "light_requirement",
+    "biodiversity_support",
+    "growth_rate",
+    "recovery_speed",
+    "soil_tolerance",
+)
+
+# Скільки ключів-дублікатів перелічується в попередженні
+DUPLICATES_SHOWN = 20
+
+# Стан рослини для порівняння з БД:
+# (source_key, scientific_name, common_name_ua, image_url,
+#  cold, drought, light, biodiversity, growth, recovery, soils)
+PlantState = tuple
+
+
+def record_key(source_key, scientific_name) -> str:
+    """Ключ ідемпотентності: source_key, а якщо його немає — латинська назва"""
+    return source_key or scientific_name
+
+
+def normalize_record(plant: Dict) -> Tuple[str, PlantState]:
+    """Перевіряє запис з JSON та перетворює його на (ключ, стан)"""
+    missing = [field for field in REQUIRED_FIELDS if field not in plant]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    if not isinstance(plant["scientific_name"], str) or not plant["scientific_name"].strip():
+        raise ValueError("scientific_name must be a non-empty string")
+    soils = plant["soil_tolerance"]
+    if not isinstance(soils, list) or not all(isinstance(soil, str) for soil in soils):
+        raise ValueError("soil_tolerance must be a list of soil codes")
+
+    source_key = plant.get("source_key")
+    state = (
+        source_key,
+        plant["scientific_name"],
+        plant["common_name_ua"],
+        plant.get("image_url"),
+        plant["cold_tolerance_c"],
+        plant["drought_tolerance"],
+        plant["light_requirement"],
+        plant["biodiversity_support"],
+        plant["growth_rate"],
+        plant["recovery_speed"],
+        tuple(sorted((soil, 1) for soil in set(soils))),
+    )
+    return record_key(source_key, plant["scientific_name"]), state
+
+
+def parse_file(path: str) -> Tuple[str, List[Tuple[str, PlantState]], List[str]]:
+    """Розбирає та валідує один файл (виконується в пулі процесів)"""
+    records = []
+    errors = []
+    for i, plant in enumerate(iter_records(path)):
+        try:
+            records.append(normalize_record(plant))
+        except (ValueError, TypeError, AttributeError) as e:
+            errors.append(f"{os.path.basename(path)}[{i}]: {e}")
+    return os.path.basename(path), records, errors
+
+
+def load_existing(cur) -> Dict[str, Tuple[int, PlantState]]:
+    """Поточний стан каталогу: ключ -> (id, стан).
+
+    Якщо в БД кілька рослин з однаковим ключем (старі імпорти без --upsert),
+    оновлюється та, що має найменший id.
+    """
+    cur.execute("SELECT plant_id, soil_code, tolerance_level FROM plant_soil_tolerance")
+    soils: Dict[int, list] = {}
+    for plant_id, soil_code, level in cur.fetchall():
+        soils.setdefault(plant_id, []).append((soil_code, level))
+
+    cur.execute(
+        """
+        SELECT
+            p.id, p.source_key, p.scientific_name, p.common_name_ua, p.image_url,
+            t.cold_tolerance_c, t.drought_tolerance, t.light_requirement,
+            t.biodiversity_support, t.growth_rate, t.recovery_speed
+        FROM plants p
+        LEFT JOIN plant_traits t ON t.plant_id = p.id
+        ORDER BY p.id
+        """
+    )
+    existing = {}
+    for plant_id, *values in cur.fetchall():
+        key = record_key(values[0], values[1])
+        if key not in existing:
+            state = tuple(values) + (tuple(sorted(soils.get(plant_id, ()))),)
+            existing[key] = (plant_id, state)
+    return existing
+
+
+def apply_changes(cur, inserted: Dict[int, PlantState], updated: Dict[int, PlantState]):
+    """Записує нові та змінені рослини пакетами"""
+    cur.executemany(
+        """
+        INSERT INTO plants (id, source_key, scientific_name, common_name_ua, image_url)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(plant_id,) + state[:4] for plant_id, state in inserted.items()],
+    )
+    cur.executemany(
+        """
+        UPDATE plants
+        SET source_key = ?, scientific_name = ?, common_name_ua = ?, image_url = ?
+        WHERE id = ?
+        """,
+        [state[:4] + (plant_id,) for plant_id, state in updated.items()],
+    )
+
+    changed = {**inserted, **updated}
+    cur.executemany(
+        """
+        INSERT OR REPLACE INTO plant_traits (
+            plant_id, cold_tolerance_c, drought_tolerance,
+            light_requirement, biodiversity_support,
+            growth_rate, recovery_speed
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        [(plant_id,) + state[4:10] for plant_id, state in changed.items()],
+    )
+    cur.executemany(
+        "DELETE FROM plant_soil_tolerance WHERE plant_id = ?",
+        [(plant_id,) for plant_id in updated],
+    )
+    cur.executemany(
+        """
+        INSERT INTO plant_soil_tolerance (plant_id, soil_code, tolerance_level)
+        VALUES (?, ?, ?)
+        """,
+        [
+            (plant_id, soil, level)
+            for plant_id, state in changed.items()
+            for soil, level in state[10]
+        ],
+    )
+
+
+def upsert_plants(data_dir=DATA_DIR, workers=None):
+    """Ідемпотентний імпорт: розбір файлів у пулі процесів, запис одним процесом.
+
+    Рослини зіставляються за source_key (або scientific_name); змінюються
+    лише нові та змінені записи, тому повторний запуск нічого не переписує.
+    """
+    paths = [
+        os.path.join(data_dir, f)
+        for f in sorted(os.listdir(data_dir))
+        if is_data_file(f)
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    conn = get_connection()
+    cur = conn.cursor()
+    started = time.perf_counter()
+    stats = Counter()
+
+    # Розбір і валідація — паралельно; пізніший запис з тим самим ключем
+    # (у порядку імен файлів) перемагає ще до порівняння з БД, тож
+    # повторний запуск на тих самих даних не змінює жодного рядка
+    incoming: Dict[str, PlantState] = {}
+    # Скільки разів ключ перекрито пізнішим записом
+    duplicate_keys: Counter = Counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(paths) > 1 else None
+    try:
+        parsed = pool.map(parse_file, paths) if pool else map(parse_file, paths)
+        for filename, records, errors in parsed:
+            for key, state in records:
+                if key in incoming:
+                    duplicate_keys[key] += 1
+                incoming[key] = state
+            stats["invalid"] += len(errors)
+            for error in errors:
+                print(f"Skipped invalid record {error}")
+            print(f"Parsed: {filename} ({len(records)} records)")
+    finally:
+        if pool:
+            pool.shutdown()
+
+    stats["duplicates"] = sum(duplicate_keys.values())
+    if duplicate_keys:
+        shown = ", ".join(
+            f"{key} (x{count + 1})" for key, count in duplicate_keys.most_common(DUPLICATES_SHOWN)
+        )
+        more = len(duplicate_keys) - DUPLICATES_SHOWN
+        print(
+            f"Warning: {stats['duplicates']} records share a key with a later record "
+            f"and were overridden ({len(duplicate_keys)} keys): {shown}"
+            + (f" and {more} more" if more > 0 else "")
+        )
+
+    cur.execute("BEGIN")
+    try:
+        ensure_indexes(conn)
+        existing = load_existing(cur)
+        plant_id = next_plant_id(cur)
+        inserted: Dict[int, PlantState] = {}
+        updated: Dict[int, PlantState] = {}
+
+        for key, state in incoming.items():
+            current = existing.get(key)
+            if current is None:
+                inserted[plant_id] = state
+                plant_id += 1
+            elif current[1] != state:
+                updated[current[0]] = state
+            else:
+                stats["unchanged"] += 1
+
+            if len(inserted) + len(updated) >= BATCH_SIZE:
+                apply_changes(cur, inserted, updated)
+                stats["inserted"] += len(inserted)
+                stats["updated"] += len(updated)
+                inserted, updated = {}, {}
+
+        apply_changes(cur, inserted, updated)
+        stats["inserted"] += len(inserted)
+        stats["updated"] += len(updated)
+
+        if stats["inserted"] or stats["updated"]:
+            # Нова версія каталогу інвалідує кеші рекомендацій у всіх воркерах
+            bump_catalog_version(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Upsert completed in {elapsed:.2f}s: {stats['inserted']} inserted, "
+        f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+        f"{stats['invalid']} invalid, {stats['duplicates']} duplicates"
+    )
+    return dict(stats)
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 class RecommendRequest(BaseModel):
@@ -9,3 +11,37 @@ class RecommendRequest(BaseModel):
     growth: int
     recovery: int
     limit: int = 10
+    # Лише рослини, вказані для ґрунту, з точно таким освітленням
+    strict: bool = False
+    # Профіль ваг score (див. GET /profiles); None — профіль за замовчуванням
+    profile: Optional[str] = None
+    # Лише ці поля рослин у відповіді (None — усі)
+    fields: Optional[List[str]] = None
+    # "records" — список рослин, "columnar" — масив значень на кожне поле
+    format: str = "records"
+
+
+class BatchRecommendRequest(BaseModel):
+    sites: List[RecommendRequest]
+
+
+class StreamRecommendRequest(RecommendRequest):
+    # Повернути всіх кандидатів, що пройшли фільтр температури (limit ігнорується)
+    all_candidates: bool = False
+
+
+class PlanRequest(BaseModel):
+    soil_code: str
+    min_temp_c: float
+    drought: int
+    light: str
+    biodiversity: int
+    growth: int
+    recovery: int
+    # Кількість видів у плані
+    species: int = 8
+    # Вага різноманіття трейтів: 0 — лише score, 1 — лише несхожість видів
+    diversity: float = 0.3
+    # Гарантувати хоча б один вид для кожного рівня освітлення серед кандидатів
+    cover_light: bool = True
+    profile: Optional[str] = None
@@ -0,0 +1,121 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+
+# orjson (requirements.txt) серіалізує великі відповіді в кілька разів швидше;
+# без нього відповіді серіалізуються стандартним json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Поля рослини у відповіді /recommend (порядок — як у build_results)
+RESULT_FIELDS = (
+    "id",
+    "scientific_name",
+    "common_name_ua",
+    "image_url",
+    "score",
+    "cold_tolerance_c",
+    "drought_tolerance",
+    "light_requirement",
+    "biodiversity_support",
+    "growth_rate",
+    "recovery_speed",
+    "explanation",
+)
+
+# "records" — список об'єктів рослин, "columnar" — масив значень на кожне поле
+RESPONSE_FORMATS = ("records", "columnar")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-відповідь через orjson, якщо він встановлений, інакше через json"""
+
+    def render(self, content) -> bytes:
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(content)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def validate_shape(fields: Optional[List[str]], response_format: str) -> Optional[str]:
+    """Повідомлення про помилку в fields / format або None"""
+    if response_format not in RESPONSE_FORMATS:
+        return f"format must be one of {', '.join(RESPONSE_FORMATS)}"
+    if fields is not None:
+        unknown = [name for name in fields if name not in RESULT_FIELDS]
+        if unknown:
+            return (
+                f"Unknown fields {', '.join(unknown)}; "
+                f"expected any of {', '.join(RESULT_FIELDS)}"
+            )
+        if not fields:
+            return "fields must not be empty"
+    return None
+
+
+def project(result: Dict, fields: Optional[List[str]]) -> Dict:
+    """Лише поля fields рослини (None — усі поля без копіювання)"""
+    if fields is None:
+        return result
+    return {name: result[name] for name in fields}
+
+
+def shape(
+    results: List[Dict], fields: Optional[List[str]] = None, response_format: str = "records"
+):
+    """Результати у форматі response_format: список рослин або {поле: [значення]}.
+
+    Словники results не змінюються (вони можуть бути в кеші відповідей).
+    """
+    if response_format == "columnar":
+        names = fields or RESULT_FIELDS
+        return {name: [result[name] for result in results] for name in names}
+    return [project(result, fields) for result in results]
+
+
+def shape_results(
+    results: List[Dict], fields: Optional[List[str]] = None, response_format: str = "records"
+) -> Dict:
+    """Тіло відповіді /recommend"""
+    body = {"results": shape(results, fields, response_format)}
+    if response_format == "columnar":
+        body["format"] = "columnar"
+        body["count"] = len(results)
+    return body
+
+
+def dumps_line(value) -> bytes:
+    """Один рядок NDJSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value) + b"\n"
+    return (json.dumps(value, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def response_etag(*parts) -> str:
+    """Сильний ETag відповіді, що однозначно визначається parts (JSON-сумісними)"""
+    key = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Чи збігається ETag з заголовком If-None-Match (слабке порівняння, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cache_control(max_age: int) -> str:
+    """Cache-Control для відповідей, які можна кешувати до зміни версії даних"""
+    if max_age <= 0:
+        return "no-cache"
+    return f"public, max-age={max_age}"
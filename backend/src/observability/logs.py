@@ -0,0 +1,60 @@
+import json
+import logging
+import random
+import time
+
+from src.config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_RATE
+
+# extra для рядків, що пишуться лише для частки запитів (LOG_SAMPLE_RATE)
+SAMPLED = {"sampled": True}
+
+# Стандартні атрибути LogRecord — все інше вважається полями з extra
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускає лише частку записів, позначених extra=SAMPLED (WARNING і вище — завжди)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок: час, рівень, логер, повідомлення та поля з extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging():
+    """Налаштовує логер "src" застосунку (рівень, формат, семплювання)"""
+    handler = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+    handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+
+    logger = logging.getLogger("src")
+    logger.handlers[:] = [handler]
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
@@ -0,0 +1,266 @@
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src import config
+from src.database.catalog_version import get_catalog_version
+from src.database.connection import get_connection
+from src.observability.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Відомі значення освітлення отримують фіксовані коди,
+# решта (якщо трапляться в даних) додається в кінець словника
+LIGHT_LABELS = ["full_sun", "partial_shade", "shade"]
+
+# Код відсутнього значення (NULL в БД) для light та толерантності ґрунту
+MISSING = -1
+
+
+class PlantCatalog:
+    """Колонкове представлення каталогу рослин у пам'яті.
+
+    Рядки відсортовані за (cold_tolerance_c, id), тому фільтр
+    `cold_tolerance_c <= min_temp_c` — це просто префікс масивів.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        scientific_names: List[str],
+        common_names: List[Optional[str]],
+        image_urls: List[Optional[str]],
+        cold: np.ndarray,
+        drought: np.ndarray,
+        light: np.ndarray,
+        light_labels: List[str],
+        biodiversity: np.ndarray,
+        growth: np.ndarray,
+        recovery: np.ndarray,
+        soil_levels: np.ndarray,
+        soil_codes: List[str],
+        version: int = 0,
+    ):
+        self.ids = ids
+        self.scientific_names = scientific_names
+        self.common_names = common_names
+        self.image_urls = image_urls
+        self.cold = cold
+        self.drought = drought
+        self.light = light
+        self.light_labels = light_labels
+        self.biodiversity = biodiversity
+        self.growth = growth
+        self.recovery = recovery
+        # soil_levels[i, j] — tolerance_level рослини i для ґрунту soil_codes[j]
+        self.soil_levels = soil_levels
+        self.soil_codes = soil_codes
+        self.soil_index = {code: j for j, code in enumerate(soil_codes)}
+        # Версія каталогу в БД, з якої завантажено дані
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls) -> "PlantCatalog":
+        """Завантажує трейти всіх рослин з БД одним проходом"""
+        conn = get_connection()
+        cur = conn.cursor()
+
+        # Версія та дані читаються з одного знімка БД
+        cur.execute("BEGIN")
+        try:
+            with span("sql_catalog_fetch"):
+                version = get_catalog_version(conn)
+                rows, soil_rows = cls._fetch_rows(cur)
+        finally:
+            conn.commit()
+
+        with span("catalog_build"):
+            return cls.from_rows(rows, soil_rows, version=version)
+
+    @staticmethod
+    def _fetch_rows(cur):
+        cur.execute(
+            """
+            SELECT
+                p.id,
+                p.scientific_name,
+                p.common_name_ua,
+                p.image_url,
+                t.cold_tolerance_c,
+                t.drought_tolerance,
+                t.light_requirement,
+                t.biodiversity_support,
+                t.growth_rate,
+                t.recovery_speed
+            FROM plants p
+            JOIN plant_traits t ON t.plant_id = p.id
+            WHERE t.cold_tolerance_c IS NOT NULL
+            ORDER BY t.cold_tolerance_c, t.plant_id
+            """
+        )
+        rows = cur.fetchall()
+
+        cur.execute(
+            # Порядок covering-індексу: рядки детерміновані (для відбитка знімка)
+            """
+            SELECT plant_id, soil_code, tolerance_level FROM plant_soil_tolerance
+            ORDER BY soil_code, plant_id
+            """
+        )
+        soil_rows = cur.fetchall()
+        return rows, soil_rows
+
+    @classmethod
+    def from_rows(
+        cls, rows: List[tuple], soil_rows: List[tuple], version: int = 0
+    ) -> "PlantCatalog":
+        """Будує каталог з рядків plants+plant_traits та plant_soil_tolerance"""
+        columns = list(zip(*rows)) if rows else [()] * 10
+        (
+            ids,
+            scientific_names,
+            common_names,
+            image_urls,
+            cold,
+            drought,
+            light_values,
+            biodiversity,
+            growth,
+            recovery,
+        ) = columns
+
+        light_labels = list(LIGHT_LABELS)
+        light_codes = {label: code for code, label in enumerate(light_labels)}
+        light = np.empty(len(rows), dtype=np.int8)
+        for i, value in enumerate(light_values):
+            if value is None:
+                light[i] = MISSING
+                continue
+            if value not in light_codes:
+                light_codes[value] = len(light_labels)
+                light_labels.append(value)
+            light[i] = light_codes[value]
+
+        ids = np.array(ids, dtype=np.int64)
+        soil_codes = sorted({soil for _, soil, _ in soil_rows})
+        soil_index = {code: j for j, code in enumerate(soil_codes)}
+        soil_levels = np.full((len(rows), len(soil_codes)), MISSING, dtype=np.int8)
+        if len(rows):
+            row_of = {int(plant_id): i for i, plant_id in enumerate(ids)}
+            for plant_id, soil, level in soil_rows:
+                i = row_of.get(plant_id)
+                if i is not None:
+                    # score_soil розрізняє лише 0, 1 та >= 2
+                    soil_levels[i, soil_index[soil]] = min(max(level, 0), 2)
+
+        return cls(
+            ids=ids,
+            scientific_names=list(scientific_names),
+            common_names=list(common_names),
+            image_urls=list(image_urls),
+            cold=_float_column(cold),
+            drought=_float_column(drought),
+            light=light,
+            light_labels=light_labels,
+            biodiversity=_float_column(biodiversity),
+            growth=_float_column(growth),
+            recovery=_float_column(recovery),
+            soil_levels=soil_levels,
+            soil_codes=soil_codes,
+            version=version,
+        )
+
+    def count_min_temp(self, min_temp_c: float) -> int:
+        """Кількість рослин з cold_tolerance_c <= min_temp_c (довжина префікса)"""
+        return int(np.searchsorted(self.cold, min_temp_c, side="right"))
+
+    def soil_column(self, soil_code: str) -> np.ndarray:
+        """Рівні толерантності всіх рослин до ґрунту soil_code"""
+        j = self.soil_index.get(soil_code)
+        if j is None:
+            return np.full(len(self), MISSING, dtype=np.int8)
+        return self.soil_levels[:, j]
+
+    def plant(self, i: int) -> Dict:
+        """Дані рослини з рядка i у форматі відповіді API"""
+        light_code = int(self.light[i])
+        return {
+            "id": int(self.ids[i]),
+            "scientific_name": self.scientific_names[i],
+            "common_name_ua": self.common_names[i],
+            "image_url": self.image_urls[i],
+            "cold_tolerance_c": float(self.cold[i]),
+            "drought_tolerance": _trait_value(self.drought[i]),
+            "light_requirement": (
+                self.light_labels[light_code] if light_code != MISSING else None
+            ),
+            "biodiversity_support": _trait_value(self.biodiversity[i]),
+            "growth_rate": _trait_value(self.growth[i]),
+            "recovery_speed": _trait_value(self.recovery[i]),
+        }
+
+
+def _float_column(values) -> np.ndarray:
+    return np.array(
+        [np.nan if v is None else v for v in values], dtype=np.float64
+    )
+
+
+def _trait_value(value: float):
+    if np.isnan(value):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+# -----------------------------
+#  Process-wide catalog
+# -----------------------------
+_catalog: Optional[PlantCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def load_process_catalog() -> PlantCatalog:
+    """Каталог з БД або, якщо CATALOG_SOURCE=shared, зі спільного mmap-знімка"""
+    if config.CATALOG_SOURCE == "shared":
+        from src.recommender.shared_catalog import export_snapshot
+        # Воркер перевіряє лише дешевий відбиток БД і відкриває знімок через
+        # mmap; рядки з SQLite читає тільки процес, що перебудовує знімок
+        with span("catalog_snapshot_open"):
+            catalog, rebuilt = export_snapshot()
+        logger.info(
+            "Каталог v%d (%d рослин) відкрито зі знімка%s",
+            catalog.version, len(catalog), " після перебудови" if rebuilt else "",
+        )
+        return catalog
+    return PlantCatalog.load()
+
+
+def get_catalog(version: Optional[int] = None) -> PlantCatalog:
+    """Повертає каталог процесу, завантажуючи його при першому зверненні.
+
+    Якщо передано version (з get_catalog_version) і вона новіша за
+    завантажену, каталог перечитується з БД.
+    """
+    global _catalog
+    catalog = _catalog
+    if catalog is None or (version is not None and version > catalog.version):
+        with _catalog_lock:
+            if _catalog is None or (version is not None and version > _catalog.version):
+                _catalog = load_process_catalog()
+            catalog = _catalog
+    return catalog
+
+
+def reload_catalog() -> PlantCatalog:
+    """Перечитує каталог з БД (наприклад, після імпорту)"""
+    global _catalog
+    catalog = load_process_catalog()
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
@@ -1,14 +1,45 @@
-import sqlite3
-from typing import List, Dict, Optional
-import asyncio
+import logging
+from typing import Iterator, List, Dict, NamedTuple, Optional, Tuple
 
-DB_PATH = "db/urban_plants.db"
+import numpy as np
 
 from src.ai.explanation_generator import (
+    backend as explanation_backend,
     get_cache_key,
-    get_cached_explanation,
-    generate_and_cache_explanation
+    get_cached_explanations,
+    generate_explanations,
 )
+from src.config import (
+    EXPLANATION_DEADLINE_S,
+    RECOMMENDER_MODE,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL_S,
+)
+from src.database.catalog_version import get_catalog_version, get_response_versions
+from src.observability.logs import SAMPLED
+from src.observability.metrics import REGISTRY, span
+from src.recommender.catalog import PlantCatalog, get_catalog
+from src.recommender.precomputed import get_precomputed_table
+from src.recommender.profiles import ADJACENT_LIGHT, get_profile
+from src.recommender.result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+# Кеш AI-пояснень: знайдені та відсутні пояснення для повернутих рослин
+EXPLANATION_CACHE_LOOKUPS = REGISTRY.counter(
+    "urban_plants_explanation_cache_lookups_total",
+    "Explanation cache lookups for returned plants",
+    labels=("result",),
+)
+
+# Максимальний розмір матриці score (запити x рослини) в пакетному режимі
+BATCH_MATRIX_CELLS = 2_000_000
+
+# Кількість рослин, що готуються за раз у потоковому режимі
+STREAM_CHUNK_SIZE = 500
+
+# Кеш готових відповідей для повторюваних запитів
+result_cache = ResultCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL_S)
 
 
 # -----------------------------
@@ -28,14 +59,7 @@ def score_light(plant_light: Optional[str], target_light: str) -> float:
     if plant_light == target_light:
         return 1.0
 
-    PAIRS = {
-        ("full_sun", "partial_shade"),
-        ("partial_shade", "full_sun"),
-        ("shade", "partial_shade"),
-        ("partial_shade", "shade"),
-    }
-
-    if (plant_light, target_light) in PAIRS:
+    if (plant_light, target_light) in ADJACENT_LIGHT:
         return 0.6
 
     return 0.3
@@ -52,9 +76,44 @@ def score_soil(level: Optional[int]) -> float:
 
 
 # -----------------------------
-#  Main Recommend Function
+#  Vectorized scoring
 # -----------------------------
-def recommend_plants(
+class CatalogScores(NamedTuple):
+    """Оцінки для `count` рядків каталогу (за замовчуванням — тих, що пройшли фільтр температури)"""
+    count: int
+    total: np.ndarray
+    drought: np.ndarray
+    biodiversity: np.ndarray
+    growth: np.ndarray
+    recovery: np.ndarray
+    light: np.ndarray
+    soil: np.ndarray
+
+
+def scale_match_array(values: np.ndarray, target: int, max_range: int = 5) -> np.ndarray:
+    """Векторний аналог scale_match (NaN відповідає None)"""
+    scores = np.maximum(0.0, 1.0 - np.abs(values - target) / max_range)
+    scores[np.isnan(values)] = 0.3
+    return scores
+
+
+def strict_rows(catalog: PlantCatalog, count: int, soil_code: str, light: str) -> np.ndarray:
+    """Рядки префікса count, що проходять жорсткі обмеження режиму strict.
+
+    Рослина має бути вказана для ґрунту soil_code (рівень >= 1) і мати
+    саме таке освітлення; решта кандидатів не оцінюється взагалі.
+    """
+    rows = slice(0, count)
+    mask = catalog.soil_column(soil_code)[rows] >= 1
+    if light in catalog.light_labels:
+        mask &= catalog.light[rows] == catalog.light_labels.index(light)
+    else:
+        mask[:] = False
+    return np.flatnonzero(mask)
+
+
+def score_catalog(
+    catalog: PlantCatalog,
     soil_code: str,
     min_temp_c: float,
     drought: int,
@@ -62,206 +121,592 @@ def recommend_plants(
     biodiversity: int,
     growth: int,
     recovery: int,
-    limit: int = 15,
-) -> List[Dict]:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        SELECT 
-            p.id,
-            p.scientific_name,
-            p.common_name_ua,
-            p.image_url,
-            t.cold_tolerance_c,
-            t.drought_tolerance,
-            t.light_requirement,
-            t.biodiversity_support,
-            t.growth_rate,
-            t.recovery_speed,
-            pst.tolerance_level
-        FROM plants p
-        LEFT JOIN plant_traits t ON t.plant_id = p.id
-        LEFT JOIN plant_soil_tolerance pst
-            ON pst.plant_id = p.id AND pst.soil_code = ?
-        WHERE t.cold_tolerance_c <= ?
-        """,
-        (soil_code, min_temp_c),
+    profile: Optional[str] = None,
+) -> CatalogScores:
+    """Рахує score для всіх рослин з cold_tolerance_c <= min_temp_c одним проходом"""
+    count = catalog.count_min_temp(min_temp_c)
+    return score_rows(
+        catalog, slice(0, count), soil_code, drought, light, biodiversity, growth, recovery,
+        profile,
     )
 
-    rows = cur.fetchall()
-    conn.close()
 
-    # Параметри запиту для кешування
-    params = {
-        'soil_code': soil_code,
-        'min_temp_c': min_temp_c,
-        'drought': drought,
-        'light': light,
-        'biodiversity': biodiversity,
-        'growth': growth,
-        'recovery': recovery,
-    }
+def score_rows(
+    catalog: PlantCatalog,
+    rows,
+    soil_code: str,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    profile: Optional[str] = None,
+) -> CatalogScores:
+    """Рахує score для вибраних рядків каталогу (slice або масив індексів).
+
+    profile — назва профілю ваг (None — SCORING_PROFILE з конфігурації).
+    """
+    scoring = get_profile(profile)
+    drought_score = scale_match_array(catalog.drought[rows], drought)
+    biodiversity_score = scale_match_array(catalog.biodiversity[rows], biodiversity)
+    growth_score = scale_match_array(catalog.growth[rows], growth)
+    recovery_score = scale_match_array(catalog.recovery[rows], recovery)
+    light_score = scoring.light_table(catalog.light_labels, light)[catalog.light[rows]]
+    soil_score = scoring.soil_table[catalog.soil_column(soil_code)[rows]]
+
+    total = scoring.total(
+        drought_score, biodiversity_score, growth_score, recovery_score, light_score, soil_score
+    )
+
+    return CatalogScores(
+        count=len(total),
+        total=total,
+        drought=drought_score,
+        biodiversity=biodiversity_score,
+        growth=growth_score,
+        recovery=recovery_score,
+        light=light_score,
+        soil=soil_score,
+    )
+
+
+def build_simple_explanation(
+    recovery_score: float,
+    biodiversity_score: float,
+    drought_score: float,
+    soil_score: float,
+) -> str:
+    """Просте пояснення на основі компонентів score"""
+    reasons = []
+    if recovery_score > 0.8:
+        reasons.append("швидке відновлення")
+    if biodiversity_score > 0.8:
+        reasons.append("висока підтримка біорізноманіття")
+    if drought_score > 0.8:
+        reasons.append("добра посухостійкість")
+    if soil_score > 0.8:
+        reasons.append("ідеальна сумісність з типом ґрунту")
+
+    return (
+        "Причини рекомендації: " + ", ".join(reasons) + "."
+        if reasons else "Рослина відповідає заданим критеріям."
+    )
+
+
+def select_top_k(total: np.ndarray, k: int) -> np.ndarray:
+    """Індекси k найкращих рослин у порядку спадання score.
+
+    Порядок такий самий, як у стабільного сортування за round(score, 3):
+    рівні округлені значення лишаються в порядку рядків каталогу.
+    Повне сортування не потрібне — спершу argpartition відсікає все,
+    що гарантовано не потрапляє в топ.
+    """
+    n = len(total)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        kth = total[np.argpartition(total, n - k)[n - k]]
+        # Запас 1e-3 покриває значення, що після округлення зрівнюються з k-м
+        candidates = np.flatnonzero(total >= kth - 1e-3)
+    else:
+        candidates = np.arange(n)
+
+    # Округлюємо так само, як у відповіді (round), лише унікальні значення
+    unique, inverse = np.unique(total[candidates], return_inverse=True)
+    keys = np.array([round(float(v), 3) for v in unique])[inverse]
+
+    order = np.lexsort((candidates, -keys))
+    return candidates[order[:k]]
+
+
+def result_cache_key(
+    catalog: PlantCatalog,
+    soil_code: str,
+    min_temp_c: float,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    limit: int,
+    strict: bool = False,
+    profile: Optional[str] = None,
+) -> tuple:
+    """Нормалізований ключ запиту для кешу відповідей.
+
+    Температура входить двічі: як кількість рослин, що проходять фільтр
+    (визначає набір кандидатів), і як int — так само, як у get_cache_key
+    (визначає, які AI-пояснення потраплять у відповідь).
+    """
+    return (
+        soil_code,
+        catalog.count_min_temp(min_temp_c),
+        int(min_temp_c),
+        drought,
+        light,
+        biodiversity,
+        growth,
+        recovery,
+        limit,
+        strict,
+        get_profile(profile).name,
+    )
+
+
+def lookup_precomputed(
+    catalog: PlantCatalog,
+    soil_code: str,
+    min_temp_c: float,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    limit: int,
+    strict: bool = False,
+    profile: Optional[str] = None,
+) -> Optional[np.ndarray]:
+    """Топ-limit з таблиці (режим "precomputed") або None"""
+    # Таблиця не враховує жорсткі обмеження strict
+    if RECOMMENDER_MODE != "precomputed" or strict:
+        return None
+    table = get_precomputed_table(catalog)
+    # Таблиця побудована для одного профілю ваг
+    if table is None or table.profile != get_profile(profile).name:
+        return None
+    return table.lookup(
+        catalog, soil_code, min_temp_c, drought, light, biodiversity, growth, recovery, limit
+    )
+
+
+def rank_candidates(
+    catalog: PlantCatalog,
+    soil_code: str,
+    min_temp_c: float,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    limit: int,
+    strict: bool = False,
+    profile: Optional[str] = None,
+) -> np.ndarray:
+    """Рядки каталогу топ-limit у порядку рангу.
+
+    У режимі "precomputed" відповідь береться з таблиці (один lookup),
+    інакше — підрахунок score для всіх кандидатів (у режимі strict —
+    лише для тих, що пройшли strict_rows).
+    """
+    with span("precomputed_lookup"):
+        top = lookup_precomputed(
+            catalog, soil_code, min_temp_c, drought, light, biodiversity, growth, recovery,
+            limit, strict, profile,
+        )
+    if top is not None:
+        return top
+
+    with span("scoring"):
+        if strict:
+            rows = strict_rows(catalog, catalog.count_min_temp(min_temp_c), soil_code, light)
+            scores = score_rows(
+                catalog, rows, soil_code, drought, light, biodiversity, growth, recovery,
+                profile,
+            )
+            return rows[select_top_k(scores.total, limit)]
+
+        scores = score_catalog(
+            catalog, soil_code, min_temp_c, drought, light, biodiversity, growth, recovery,
+            profile,
+        )
+        return select_top_k(scores.total, limit)
+
+
+def build_results(
+    catalog: PlantCatalog,
+    top: np.ndarray,
+    plants: List[Dict],
+    params: Dict,
+    cache_keys: List[str],
+    cached_explanations: Dict,
+    profile: Optional[str] = None,
+) -> List[Dict]:
+    """Словники відповіді для рядків top (AI-пояснення з кешу або просте)"""
+    # Компоненти score лише для повернутих рядків (для простих пояснень)
+    scores = score_rows(
+        catalog, top, params['soil_code'], params['drought'], params['light'],
+        params['biodiversity'], params['growth'], params['recovery'], profile,
+    )
 
     results: List[Dict] = []
 
-    for row in rows:
-        (
-            plant_id,
-            scientific_name,
-            common_name_ua,
-            image_url,
-            cold,
-            drought_db,
-            light_db,
-            biodiversity_db,
-            growth_db,
-            recovery_db,
-            soil_level,
-        ) = row
-
-        # --- scoring
-        drought_score = scale_match(drought_db, drought)
-        biodiversity_score = scale_match(biodiversity_db, biodiversity)
-        growth_score = scale_match(growth_db, growth)
-        recovery_score = scale_match(recovery_db, recovery)
-        light_score = score_light(light_db, light)
-        soil_score = score_soil(soil_level)
-
-        # weight tuning for 1000+ dataset
-        total_score = (
-            1.1 * drought_score
-            + 1.2 * biodiversity_score
-            + 0.9 * growth_score
-            + 1.4 * recovery_score
-            + 1.0 * light_score
-            + 1.0 * soil_score
-        ) / 6.6
+    for i, (plant, cache_key) in enumerate(zip(plants, cache_keys)):
+        plant_id = plant["id"]
 
         # --- explanation (просте)
-        reasons = []
-        if recovery_score > 0.8:
-            reasons.append("швидке відновлення")
-        if biodiversity_score > 0.8:
-            reasons.append("висока підтримка біорізноманіття")
-        if drought_score > 0.8:
-            reasons.append("добра посухостійкість")
-        if soil_score > 0.8:
-            reasons.append("ідеальна сумісність з типом ґрунту")
-
-        simple_explanation = (
-            "Причини рекомендації: " + ", ".join(reasons) + "."
-            if reasons else "Рослина відповідає заданим критеріям."
+        simple_explanation = build_simple_explanation(
+            recovery_score=scores.recovery[i],
+            biodiversity_score=scores.biodiversity[i],
+            drought_score=scores.drought[i],
+            soil_score=scores.soil[i],
         )
         
-        # Перевіряємо кеш для AI-пояснення
-        cache_key = get_cache_key(plant_id, params)
-        cached_ai_explanation = get_cached_explanation(plant_id, cache_key)
-        
-        if cached_ai_explanation:
-            print(f"[Engine] ✅ Знайдено AI-пояснення в кеші для рослини {plant_id} (key: {cache_key[:8]}...)")
-        else:
-            print(f"[Engine] ⚠️ AI-пояснення немає в кеші для рослини {plant_id} (key: {cache_key[:8]}...)")
-        
         # Використовуємо AI-пояснення якщо є в кеші, інакше просте
+        cached_ai_explanation = cached_explanations.get((plant_id, cache_key))
         explanation = cached_ai_explanation if cached_ai_explanation else simple_explanation
         
         # Гарантуємо, що пояснення завжди є
         if not explanation or explanation.strip() == "":
             explanation = "Рослина відповідає заданим критеріям."
-        
-        plant_data = {
-            'id': plant_id,
-            'scientific_name': scientific_name,
-            'common_name_ua': common_name_ua,
-            'cold_tolerance_c': cold,
-            'drought_tolerance': drought_db,
-            'light_requirement': light_db,
-            'biodiversity_support': biodiversity_db,
-            'growth_rate': growth_db,
-            'recovery_speed': recovery_db,
-        }
 
         results.append(
             {
                 "id": plant_id,
-                "scientific_name": scientific_name,
-                "common_name_ua": common_name_ua,
-                "image_url": image_url,
-                "score": round(float(total_score), 3),
-                "cold_tolerance_c": cold,
-                "drought_tolerance": drought_db,
-                "light_requirement": light_db,
-                "biodiversity_support": biodiversity_db,
-                "growth_rate": growth_db,
-                "recovery_speed": recovery_db,
+                "scientific_name": plant["scientific_name"],
+                "common_name_ua": plant["common_name_ua"],
+                "image_url": plant["image_url"],
+                "score": round(float(scores.total[i]), 3),
+                "cold_tolerance_c": plant["cold_tolerance_c"],
+                "drought_tolerance": plant["drought_tolerance"],
+                "light_requirement": plant["light_requirement"],
+                "biodiversity_support": plant["biodiversity_support"],
+                "growth_rate": plant["growth_rate"],
+                "recovery_speed": plant["recovery_speed"],
                 "explanation": explanation,
             }
         )
 
-    # Сортуємо перед обмеженням
-    results.sort(key=lambda x: x["score"], reverse=True)
-    final_results = results[:limit]
-    
-    # Синхронно генеруємо AI-пояснення для топ-3 рослин без кешу
-    print(f"[Engine] Перевіряємо та генеруємо AI-пояснення для топ-3 рослин...")
-    print(f"[Engine] Параметри запиту: soil={params['soil_code']}, temp={params['min_temp_c']}, drought={params['drought']}, light={params['light']}, bio={params['biodiversity']}, growth={params['growth']}, recovery={params['recovery']}")
-    
-    # Оновлюємо пояснення для топ-3 рослин синхронно
-    for i, plant_result in enumerate(final_results[:3]):
-        plant_id = plant_result["id"]
-        cache_key = get_cache_key(plant_id, params)
-        cached_ai_explanation = get_cached_explanation(plant_id, cache_key)
-        
-        print(f"[Engine] Рослина {plant_id} ({plant_result['scientific_name']}): cache_key={cache_key[:16]}..., cached={'YES' if cached_ai_explanation else 'NO'}")
-        
-        if not cached_ai_explanation:
-            print(f"[Engine] Генеруємо AI-пояснення для рослини {plant_id} ({plant_result['scientific_name']}) - топ {i+1} (синхронно)...")
-            # Створюємо plant_data для генерації
-            plant_data = {
-                'id': plant_id,
-                'scientific_name': plant_result['scientific_name'],
-                'common_name_ua': plant_result['common_name_ua'],
-                'cold_tolerance_c': plant_result['cold_tolerance_c'],
-                'drought_tolerance': plant_result['drought_tolerance'],
-                'light_requirement': plant_result['light_requirement'],
-                'biodiversity_support': plant_result['biodiversity_support'],
-                'growth_rate': plant_result['growth_rate'],
-                'recovery_speed': plant_result['recovery_speed'],
-            }
-            
-            # Синхронно генеруємо та зберігаємо пояснення
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(
-                    generate_and_cache_explanation(plant_data, params)
+    return results
+
+
+# -----------------------------
+#  Main Recommend Function
+# -----------------------------
+class Recommendation(NamedTuple):
+    """Результат підбору та чи генеруються ще AI-пояснення для топ-3"""
+    results: List[Dict]
+    explanations_pending: bool
+
+
+def recommend_plants(*args, **kwargs) -> List[Dict]:
+    """Повертає топ-limit рослин для заданих умов (див. recommend_plants_status)"""
+    return recommend_plants_status(*args, **kwargs).results
+
+
+def recommend_plants_status(
+    soil_code: str,
+    min_temp_c: float,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    limit: int = 15,
+    explanation_timeout: Optional[float] = None,
+    strict: bool = False,
+    profile: Optional[str] = None,
+    versions: Optional[Tuple[int, int]] = None,
+) -> Recommendation:
+    """Топ-limit рослин для заданих умов та чи генеруються ще пояснення.
+
+    Поки explanations_pending, частина топ-3 має тимчасове просте
+    пояснення: таку відповідь не кешують ні тут, ні клієнти.
+
+    explanation_timeout — скільки секунд чекати на AI-пояснення для топ-3
+    (None — значення EXPLANATION_DEADLINE_S з конфігурації).
+    strict — повертати лише рослини, вказані для ґрунту, з точно таким освітленням.
+    profile — назва профілю ваг score (None — SCORING_PROFILE з конфігурації).
+    versions — (catalog_version, explanations_version), прочитані викликом
+    (наприклад, для ETag); None — поточні версії з БД. Кеш відповідей
+    прив'язаний саме до цієї пари, тож відповідь з кешу відповідає їй.
+    """
+    versions = versions or get_response_versions()
+    catalog = get_catalog(versions[0])
+
+    key = result_cache_key(
+        catalog, soil_code, min_temp_c, drought, light, biodiversity, growth, recovery, limit,
+        strict, profile,
+    )
+    cached_results = result_cache.get(key, versions)
+    if cached_results is not None:
+        return Recommendation(cached_results, False)
+
+    # Параметри запиту для кешування
+    params = {
+        'soil_code': soil_code,
+        'min_temp_c': min_temp_c,
+        'drought': drought,
+        'light': light,
+        'biodiversity': biodiversity,
+        'growth': growth,
+        'recovery': recovery,
+    }
+
+    # Відбираємо топ-limit до побудови словників результатів
+    top = rank_candidates(
+        catalog, soil_code, min_temp_c, drought, light, biodiversity, growth, recovery, limit,
+        strict, profile,
+    )
+    plants = [catalog.plant(i) for i in top]
+    cache_keys = [get_cache_key(plant["id"], params) for plant in plants]
+
+    # Один запит до кешу AI-пояснень для всіх повернутих рослин
+    cached_explanations = get_cached_explanations(
+        [(plant["id"], cache_key) for plant, cache_key in zip(plants, cache_keys)]
+    )
+    EXPLANATION_CACHE_LOOKUPS.inc(len(cached_explanations), result="hit")
+    EXPLANATION_CACHE_LOOKUPS.inc(len(plants) - len(cached_explanations), result="miss")
+    logger.debug(
+        "AI-пояснень у кеші: %d/%d", len(cached_explanations), len(plants), extra=SAMPLED
+    )
+
+    with span("build_results"):
+        final_results = build_results(
+            catalog, top, plants, params, cache_keys, cached_explanations, profile
+        )
+
+    # Паралельно генеруємо AI-пояснення для топ-3 рослин без кешу
+    missing = [
+        plant for plant, cache_key in zip(plants[:3], cache_keys)
+        if (plant["id"], cache_key) not in cached_explanations
+    ]
+    if missing:
+        logger.info(
+            "Генеруємо AI-пояснення для %d рослин з топ-3", len(missing),
+            extra={**SAMPLED, **params},
+        )
+
+        timeout = EXPLANATION_DEADLINE_S if explanation_timeout is None else explanation_timeout
+        generated, pending = generate_explanations(missing, params, timeout=timeout)
+
+        # Оновлюємо пояснення в результаті
+        for plant_result in final_results[:3]:
+            if plant_result["id"] in generated:
+                plant_result["explanation"] = generated[plant_result["id"]]
+                logger.debug(
+                    "Оновлено пояснення для рослини %d в результаті", plant_result["id"],
+                    extra=SAMPLED,
                 )
-                loop.close()
-                
-                # Оновлюємо пояснення в результаті
-                updated_explanation = get_cached_explanation(plant_id, cache_key)
-                if updated_explanation:
-                    # Знаходимо відповідний результат і оновлюємо його
-                    for result in final_results:
-                        if result["id"] == plant_id:
-                            result["explanation"] = updated_explanation
-                            print(f"[Engine] ✅ Оновлено пояснення для рослини {plant_id} в результаті")
-                            break
-            except Exception as e:
-                print(f"[Engine] ❌ Помилка генерації AI-пояснення: {type(e).__name__}: {e}")
-                import traceback
-                traceback.print_exc()
-        else:
-            print(f"[Engine] ✅ AI-пояснення вже є в кеші для рослини {plant_id}")
-            # Оновлюємо пояснення в результаті з кешу
-            for result in final_results:
-                if result["id"] == plant_id:
-                    result["explanation"] = cached_ai_explanation
-                    break
-    
-    return final_results
+
+        # Поки AI-пояснення генеруються у фоні, відповідь не кешуємо,
+        # щоб наступні запити отримали їх з кешу пояснень
+        if pending:
+            return Recommendation(final_results, True)
+
+    result_cache.put(key, versions, final_results)
+    return Recommendation(final_results, False)
+
+
+def rank_site_group(
+    catalog: PlantCatalog,
+    soil_code: str,
+    count: int,
+    sites: List[Dict],
+    profile: Optional[str] = None,
+) -> List[np.ndarray]:
+    """Топ-limit для ділянок з однаковим ґрунтом, префіксом каталогу та профілем.
+
+    Оцінки компонентів рахуються один раз на кожне значення слайдера,
+    а підсумковий score — матрицею для кількох ділянок одразу.
+    """
+    scoring = get_profile(profile)
+    rows = slice(0, count)
+    soil_score = scoring.soil_table[catalog.soil_column(soil_code)[rows]]
+    columns = {
+        "drought": catalog.drought[rows],
+        "biodiversity": catalog.biodiversity[rows],
+        "growth": catalog.growth[rows],
+        "recovery": catalog.recovery[rows],
+    }
+    memo: Dict[Tuple[str, object], np.ndarray] = {}
+
+    def component(name: str, value) -> np.ndarray:
+        if (name, value) not in memo:
+            if name == "light":
+                memo[name, value] = scoring.light_table(catalog.light_labels, value)[
+                    catalog.light[rows]
+                ]
+            else:
+                memo[name, value] = scale_match_array(columns[name], value)
+        return memo[name, value]
+
+    tops: List[np.ndarray] = []
+    chunk = max(1, BATCH_MATRIX_CELLS // max(count, 1))
+    for start in range(0, len(sites), chunk):
+        part = sites[start:start + chunk]
+        stacked = {
+            name: np.stack([component(name, site[name]) for site in part])
+            for name in ("drought", "biodiversity", "growth", "recovery", "light")
+        }
+        # Той самий порядок операцій, що й у score_rows
+        total = scoring.total(
+            stacked["drought"],
+            stacked["biodiversity"],
+            stacked["growth"],
+            stacked["recovery"],
+            stacked["light"],
+            soil_score,
+        )
+        tops.extend(select_top_k(total[j], site["limit"]) for j, site in enumerate(part))
+    return tops
+
+
+def recommend_plants_batch(sites: List[Dict]) -> List[List[Dict]]:
+    """Рекомендації для багатьох ділянок за один прохід по каталогу.
+
+    sites — словники з параметрами recommend_plants (soil_code, min_temp_c,
+    drought, light, biodiversity, growth, recovery, limit, strict, profile).
+    Ділянки з однаковим ґрунтом, температурним префіксом і профілем
+    оцінюються разом.
+    AI-пояснення беруться лише з кешу, нові не генеруються.
+    """
+    versions = get_response_versions()
+    catalog = get_catalog(versions[0])
+    results: List[Optional[List[Dict]]] = [None] * len(sites)
+    tops: Dict[int, np.ndarray] = {}
+    groups: Dict[Tuple[str, int, str], List[int]] = {}
+
+    for n, site in enumerate(sites):
+        cached_results = result_cache.get(result_cache_key(catalog, **site), versions)
+        if cached_results is not None:
+            results[n] = cached_results
+            continue
+        top = lookup_precomputed(catalog, **site)
+        if top is not None:
+            tops[n] = top
+            continue
+        if site.get("strict"):
+            # Кандидати strict залежать ще й від освітлення — оцінюються окремо
+            tops[n] = rank_candidates(catalog, **site)
+            continue
+        group = (
+            site["soil_code"],
+            catalog.count_min_temp(site["min_temp_c"]),
+            get_profile(site.get("profile")).name,
+        )
+        groups.setdefault(group, []).append(n)
+
+    with span("batch_scoring"):
+        for (soil_code, count, profile), members in groups.items():
+            group_tops = rank_site_group(
+                catalog, soil_code, count, [sites[n] for n in members], profile
+            )
+            tops.update(zip(members, group_tops))
+
+    # Один запит до кешу AI-пояснень для всіх ділянок
+    prepared = {}
+    for n, top in tops.items():
+        params = {
+            name: value for name, value in sites[n].items()
+            if name not in ("limit", "strict", "profile")
+        }
+        plants = [catalog.plant(i) for i in top]
+        cache_keys = [get_cache_key(plant["id"], params) for plant in plants]
+        prepared[n] = (top, plants, params, cache_keys)
+    cached_explanations = get_cached_explanations(
+        [
+            (plant["id"], cache_key)
+            for _, plants, _, cache_keys in prepared.values()
+            for plant, cache_key in zip(plants, cache_keys)
+        ]
+    )
+
+    with span("build_results"):
+        for n, (top, plants, params, cache_keys) in prepared.items():
+            results[n] = build_results(
+                catalog, top, plants, params, cache_keys, cached_explanations,
+                sites[n].get("profile"),
+            )
+
+    logger.info(
+        "Пакет: %d ділянок, %d з кешу, %d груп ґрунт/температура/профіль",
+        len(sites), len(sites) - len(tops), len(groups), extra=SAMPLED,
+    )
+    return results
+
+
+def stream_recommendations(
+    soil_code: str,
+    min_temp_c: float,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    limit: Optional[int] = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    strict: bool = False,
+    profile: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Рекомендації по одній у порядку рангу (limit=None — усі кандидати).
+
+    Ранжування виконується одразу (помилки виникають до початку відповіді),
+    а словники результатів будуються пакетами по chunk_size рослин, тож
+    пам'ять не залежить від кількості кандидатів. AI-пояснення беруться
+    лише з кешу.
+    """
+    catalog = get_catalog(get_catalog_version())
+    if limit is None:
+        limit = catalog.count_min_temp(min_temp_c)
+
+    params = {
+        'soil_code': soil_code,
+        'min_temp_c': min_temp_c,
+        'drought': drought,
+        'light': light,
+        'biodiversity': biodiversity,
+        'growth': growth,
+        'recovery': recovery,
+    }
+    top = rank_candidates(
+        catalog, soil_code, min_temp_c, drought, light, biodiversity, growth, recovery, limit,
+        strict, profile,
+    )
+    return _iter_results(catalog, top, params, chunk_size, profile)
+
+
+def _iter_results(
+    catalog: PlantCatalog,
+    top: np.ndarray,
+    params: Dict,
+    chunk_size: int,
+    profile: Optional[str] = None,
+) -> Iterator[Dict]:
+    for start in range(0, len(top), chunk_size):
+        rows = top[start:start + chunk_size]
+        plants = [catalog.plant(i) for i in rows]
+        cache_keys = [get_cache_key(plant["id"], params) for plant in plants]
+        cached_explanations = get_cached_explanations(
+            [(plant["id"], cache_key) for plant, cache_key in zip(plants, cache_keys)]
+        )
+        yield from build_results(
+            catalog, rows, plants, params, cache_keys, cached_explanations, profile
+        )
+
+
+# -----------------------------
+#   Worker preload
+# -----------------------------
+def preload() -> PlantCatalog:
+    """Готує стан процесу до першого запиту.
+
+    Завантажує (або відкриває спільний) каталог, таблицю передрахунку,
+    клієнт генератора пояснень і один раз проганяє підрахунок score.
+    """
+    with span("preload"):
+        catalog = get_catalog(get_catalog_version())
+        if RECOMMENDER_MODE == "precomputed":
+            get_precomputed_table(catalog)
+        explanation_backend.prepare()
+        if len(catalog):
+            scores = score_catalog(
+                catalog, catalog.soil_codes[0] if catalog.soil_codes else "",
+                float(catalog.cold[-1]), 3, catalog.light_labels[0], 3, 3, 3,
+            )
+            select_top_k(scores.total, 3)
+    logger.info("Воркер готовий: каталог v%d, %d рослин", catalog.version, len(catalog))
+    return catalog
 
 
 # -----------------------------
@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.ai.explanation_generator import get_cache_key, get_cached_explanations
+from src.database.catalog_version import get_catalog_version
+from src.observability.metrics import span
+from src.recommender.catalog import MISSING, PlantCatalog, get_catalog
+from src.recommender.engine import build_results, score_rows, select_top_k
+
+# Максимальна кількість видів в одному плані
+PLAN_MAX_SPECIES = 50
+
+# Скільки найкращих за score кандидатів розглядає жадібний відбір:
+# вартість MMR — O(species * pool), тож план на десятки тисяч рослин
+# рахується за мілісекунди
+PLAN_POOL_SIZE = 2000
+
+# Трейти, за якими вимірюється схожість видів (шкала 1–5)
+TRAIT_COLUMNS = ("drought", "biodiversity", "growth", "recovery")
+
+
+def trait_vectors(catalog: PlantCatalog, rows: np.ndarray) -> np.ndarray:
+    """Нормовані вектори трейтів: шкали 1–5 -> [0, 1] та one-hot освітлення.
+
+    One-hot масштабовано на 1/sqrt(2), тож різне освітлення дає
+    відстань 1 — стільки ж, скільки повна різниця одного трейту.
+    """
+    traits = np.column_stack([getattr(catalog, name)[rows] for name in TRAIT_COLUMNS])
+    traits = np.nan_to_num((traits - 1.0) / 4.0, nan=0.5)
+
+    codes = catalog.light[rows]
+    light = np.zeros((len(rows), len(catalog.light_labels)))
+    known = codes != MISSING
+    light[np.flatnonzero(known), codes[known]] = 1.0 / np.sqrt(2.0)
+    return np.hstack([traits, light])
+
+
+def best_of_missing_groups(
+    groups: np.ndarray, relevance: np.ndarray, positions: np.ndarray
+) -> np.ndarray:
+    """Найкраща позиція кожної групи, якої немає серед positions.
+
+    Пул MMR обмежений PLAN_POOL_SIZE найкращими кандидатами; рідкісне
+    освітлення могло до нього не потрапити, хоча кандидати з ним є.
+    """
+    present = set(groups[positions].tolist())
+    extra = []
+    for group in np.unique(groups[groups != MISSING]).tolist():
+        if group in present:
+            continue
+        members = np.flatnonzero(groups == group)
+        extra.append(int(members[np.argmax(relevance[members])]))
+    return np.array(extra, dtype=positions.dtype)
+
+
+def select_diverse(
+    relevance: np.ndarray,
+    vectors: np.ndarray,
+    groups: np.ndarray,
+    k: int,
+    diversity: float,
+    cover_groups: bool,
+) -> List[int]:
+    """Жадібний відбір k рядків за maximal marginal relevance.
+
+    На кожному кроці обирається рядок з найбільшим
+    (1 - diversity) * relevance - diversity * max_similarity до вже обраних.
+    Якщо cover_groups, останні місця плану резервуються за групами
+    (рівнями освітлення), що ще не представлені.
+    """
+    n = len(relevance)
+    max_distance = np.sqrt(len(TRAIT_COLUMNS) + 1.0)
+    max_similarity = np.zeros(n)
+    available = np.ones(n, dtype=bool)
+    uncovered = set(np.unique(groups[groups != MISSING]).tolist()) if cover_groups else set()
+    selected: List[int] = []
+
+    while len(selected) < min(k, n):
+        allowed = available
+        if uncovered and k - len(selected) <= len(uncovered):
+            allowed = available & np.isin(groups, list(uncovered))
+
+        gain = (1.0 - diversity) * relevance - diversity * max_similarity
+        gain[~allowed] = -np.inf
+        best = int(np.argmax(gain))
+
+        selected.append(best)
+        available[best] = False
+        uncovered.discard(int(groups[best]))
+
+        similarity = 1.0 - np.linalg.norm(vectors - vectors[best], axis=1) / max_distance
+        np.maximum(max_similarity, similarity, out=max_similarity)
+
+    return selected
+
+
+def plan_site(
+    soil_code: str,
+    min_temp_c: float,
+    drought: int,
+    light: str,
+    biodiversity: int,
+    growth: int,
+    recovery: int,
+    species: int = 8,
+    diversity: float = 0.3,
+    cover_light: bool = True,
+    profile: Optional[str] = None,
+) -> Dict:
+    """Набір видів для ділянки: високий score і різноманіття трейтів.
+
+    Кандидати — рослини, що витримують min_temp_c і вказані для ґрунту
+    soil_code. Score ділянки (як у recommend_plants) задає релевантність,
+    а diversity (0–1) — наскільки сильно штрафується схожість видів.
+    profile — назва профілю ваг score (None — SCORING_PROFILE з конфігурації).
+    """
+    catalog = get_catalog(get_catalog_version())
+    params = {
+        'soil_code': soil_code,
+        'min_temp_c': min_temp_c,
+        'drought': drought,
+        'light': light,
+        'biodiversity': biodiversity,
+        'growth': growth,
+        'recovery': recovery,
+    }
+
+    with span("planning"):
+        count = catalog.count_min_temp(min_temp_c)
+        candidates = np.flatnonzero(catalog.soil_column(soil_code)[:count] >= 1)
+        scores = score_rows(
+            catalog, candidates, soil_code, drought, light, biodiversity, growth, recovery,
+            profile,
+        )
+        positions = select_top_k(scores.total, PLAN_POOL_SIZE)
+        if cover_light:
+            positions = np.concatenate([
+                positions,
+                best_of_missing_groups(catalog.light[candidates], scores.total, positions),
+            ])
+        pool = candidates[positions]
+        relevance = scores.total[positions]
+
+        chosen = select_diverse(
+            relevance,
+            trait_vectors(catalog, pool),
+            catalog.light[pool],
+            species,
+            diversity,
+            cover_light,
+        )
+        top = pool[chosen]
+
+    plants = [catalog.plant(i) for i in top]
+    cache_keys = [get_cache_key(plant["id"], params) for plant in plants]
+    cached_explanations = get_cached_explanations(
+        [(plant["id"], cache_key) for plant, cache_key in zip(plants, cache_keys)]
+    )
+    results = build_results(
+        catalog, top, plants, params, cache_keys, cached_explanations, profile
+    )
+
+    coverage: Dict[str, int] = {}
+    for plant in plants:
+        label = plant["light_requirement"] or "unknown"
+        coverage[label] = coverage.get(label, 0) + 1
+
+    return {
+        "plan": results,
+        "candidates": len(candidates),
+        "light_coverage": coverage,
+        "mean_score": round(float(relevance[chosen].mean()), 3) if chosen else 0.0,
+    }
@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from src import config
+from src.recommender.catalog import PlantCatalog
+
+logger = logging.getLogger(__name__)
+
+# Версія формату файлу таблиці
+FORMAT_VERSION = 1
+
+# Допустимі значення слайдерів drought / biodiversity / growth / recovery
+SLIDER_MIN = 1
+SLIDER_MAX = 5
+
+
+class PrecomputedTable:
+    """Топ-N рядків каталогу для кожної комбінації дискретних параметрів.
+
+    rows[bucket, soil, light, drought-1, biodiversity-1, growth-1, recovery-1]
+    містить індекси рядків каталогу в порядку рангу (-1 — порожньо).
+    Температурний кошик `bucket` покриває всі рослини з
+    cold_tolerance_c <= boundaries[bucket], тобто надмножину кандидатів
+    для будь-якої min_temp_c <= boundaries[bucket].
+    """
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        boundaries: np.ndarray,
+        soil_codes: List[str],
+        light_labels: List[str],
+        catalog_version: int,
+        n_plants: int,
+        profile: str = "default",
+    ):
+        self.rows = rows
+        self.boundaries = boundaries
+        self.soil_codes = soil_codes
+        self.light_labels = light_labels
+        self.catalog_version = catalog_version
+        self.n_plants = n_plants
+        # Профіль ваг, з яким рахувались рейтинги
+        self.profile = profile
+        self.top_n = rows.shape[-1]
+        self.soil_index = {code: i for i, code in enumerate(soil_codes)}
+        self.light_index = {label: i for i, label in enumerate(light_labels)}
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            format_version=np.array(FORMAT_VERSION),
+            rows=self.rows,
+            boundaries=self.boundaries,
+            soil_codes=np.array(self.soil_codes),
+            light_labels=np.array(self.light_labels),
+            catalog_version=np.array(self.catalog_version),
+            n_plants=np.array(self.n_plants),
+            profile=np.array(self.profile),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PrecomputedTable":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"Непідтримувана версія формату таблиці: {path}")
+            return cls(
+                rows=data["rows"],
+                boundaries=data["boundaries"],
+                soil_codes=[str(code) for code in data["soil_codes"]],
+                light_labels=[str(label) for label in data["light_labels"]],
+                catalog_version=int(data["catalog_version"]),
+                n_plants=int(data["n_plants"]),
+                # Таблиці, збережені до появи профілів, рахувались з "default"
+                profile=str(data["profile"]) if "profile" in data.files else "default",
+            )
+
+    def matches(self, catalog: PlantCatalog) -> bool:
+        """Чи побудована таблиця для цього стану каталогу"""
+        return (
+            self.catalog_version == catalog.version
+            and self.n_plants == len(catalog)
+        )
+
+    def lookup(
+        self,
+        catalog: PlantCatalog,
+        soil_code: str,
+        min_temp_c: float,
+        drought: int,
+        light: str,
+        biodiversity: int,
+        growth: int,
+        recovery: int,
+        limit: int,
+    ) -> Optional[np.ndarray]:
+        """Рядки каталогу топ-limit або None, якщо запит не покривається таблицею"""
+        soil_i = self.soil_index.get(soil_code)
+        light_i = self.light_index.get(light)
+        sliders = (drought, biodiversity, growth, recovery)
+        if (
+            len(self.boundaries) == 0
+            or soil_i is None
+            or light_i is None
+            or limit > self.top_n
+            or not all(_is_slider(value) for value in sliders)
+        ):
+            return None
+
+        # Найменший кошик, що містить усіх кандидатів для min_temp_c
+        bucket = min(
+            int(np.searchsorted(self.boundaries, min_temp_c, side="left")),
+            len(self.boundaries) - 1,
+        )
+        ranked = self.rows[(bucket, soil_i, light_i) + tuple(v - SLIDER_MIN for v in sliders)]
+        ranked = ranked[ranked >= 0]
+
+        # Фільтр cold_tolerance_c: кандидати — префікс каталогу
+        count = catalog.count_min_temp(min_temp_c)
+        top = ranked[ranked < count]
+
+        # Якщо кошик обрізано до top_n і після фільтра лишилось менше limit,
+        # решта кандидатів могла не потрапити в таблицю
+        if len(top) < limit and len(ranked) == self.top_n:
+            return None
+        return top[:limit].astype(np.intp)
+
+
+def _is_slider(value) -> bool:
+    return isinstance(value, int) and SLIDER_MIN <= value <= SLIDER_MAX
+
+
+def temperature_buckets(catalog: PlantCatalog, max_buckets: int) -> np.ndarray:
+    """Межі температурних кошиків: різні значення cold_tolerance_c (або їх квантилі)"""
+    values = np.unique(catalog.cold)
+    if len(values) > max_buckets:
+        values = np.unique(np.quantile(values, np.linspace(0, 1, max_buckets), method="higher"))
+    return values
+
+
+# -----------------------------
+#  Process-wide table
+# -----------------------------
+_table: Optional[PrecomputedTable] = None
+_table_mtime: Optional[float] = None
+_table_lock = threading.Lock()
+
+
+def get_precomputed_table(catalog: PlantCatalog) -> Optional[PrecomputedTable]:
+    """Таблиця для поточного каталогу або None (файлу немає чи він застарів).
+
+    Файл перечитується, лише коли змінився час його модифікації.
+    """
+    global _table, _table_mtime
+    path = config.PRECOMPUTED_TABLE_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    with _table_lock:
+        if _table is None or mtime != _table_mtime:
+            _table = PrecomputedTable.load(path)
+            _table_mtime = mtime
+            if not _table.matches(catalog):
+                logger.warning("Таблиця %s застаріла, використовується підрахунок наживо", path)
+        table = _table
+
+    return table if table.matches(catalog) else None
@@ -0,0 +1,201 @@
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src import config
+
+# Компоненти score у порядку додавання (порядок впливає на округлення)
+COMPONENTS = ("drought", "biodiversity", "growth", "recovery", "light", "soil")
+
+# Пари освітлення (рослина, ділянка), що вважаються сусідніми
+ADJACENT_LIGHT = frozenset({
+    ("full_sun", "partial_shade"),
+    ("partial_shade", "full_sun"),
+    ("shade", "partial_shade"),
+    ("partial_shade", "shade"),
+})
+
+# Профіль "default" — історичні ваги рекомендацій
+DEFAULT_WEIGHTS = {
+    "drought": 1.1,
+    "biodiversity": 1.2,
+    "growth": 0.9,
+    "recovery": 1.4,
+    "light": 1.0,
+    "soil": 1.0,
+}
+# Оцінка освітлення: збіг, сусіднє, інше, не вказано
+DEFAULT_LIGHT_SCORES = {"match": 1.0, "adjacent": 0.6, "other": 0.3, "missing": 0.3}
+# Оцінка ґрунту за tolerance_level (2 — рівень 2 і вище)
+DEFAULT_SOIL_SCORES = {"0": 0.3, "1": 0.6, "2": 1.0, "missing": 0.2}
+
+# Вбудовані профілі; файл SCORING_PROFILES_PATH може додати нові або
+# перевизначити ці (пропущені значення беруться з "default")
+BUILTIN_PROFILES = {
+    "default": {
+        "description": "Збалансовані ваги за замовчуванням",
+    },
+    "post_war_recovery": {
+        "description": "Відновлення територій після військових дій: швидке відновлення та біорізноманіття",
+        "weights": {"recovery": 2.2, "biodiversity": 1.6, "growth": 1.2, "soil": 1.2},
+    },
+    "urban_heat_island": {
+        "description": "Міські острови тепла: посухостійкість і витривалість до сонця",
+        "weights": {"drought": 2.2, "light": 1.4, "biodiversity": 0.8, "recovery": 1.0},
+        "light_scores": {"adjacent": 0.5, "other": 0.2},
+    },
+}
+
+
+class ScoringProfile:
+    """Скомпільований профіль підрахунку score.
+
+    Ваги зберігаються вектором у порядку COMPONENTS, оцінки ґрунту —
+    таблицею за кодом рівня, а таблиці оцінок освітлення будуються один
+    раз на кожен словник освітлення каталогу та цільове освітлення.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        weights: Dict[str, float],
+        light_scores: Dict[str, float],
+        soil_scores: Dict[str, float],
+        description: str = "",
+    ):
+        self.name = name
+        self.description = description
+        self.weights = tuple(float(weights[component]) for component in COMPONENTS)
+        # round прибирає похибку суми з плаваючою комою (6.6000000000000005)
+        self.normalization = round(sum(self.weights), 9)
+        self.light_scores = dict(light_scores)
+        self.soil_scores = dict(soil_scores)
+        # Індекс — код рівня толерантності 0, 1, 2 або -1 (не вказано)
+        self.soil_table = np.array([
+            soil_scores["0"], soil_scores["1"], soil_scores["2"], soil_scores["missing"]
+        ])
+        self._light_tables: Dict[Tuple[Tuple[str, ...], str], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def light_score(self, plant_light: Optional[str], target_light: str) -> float:
+        if plant_light is None:
+            return self.light_scores["missing"]
+        if plant_light == target_light:
+            return self.light_scores["match"]
+        if (plant_light, target_light) in ADJACENT_LIGHT:
+            return self.light_scores["adjacent"]
+        return self.light_scores["other"]
+
+    def light_table(self, light_labels: List[str], target_light: str) -> np.ndarray:
+        """Оцінки за кодом освітлення; останній елемент — для коду -1.
+
+        Таблиці зберігаються лише для освітлення зі словника каталогу:
+        будь-яке інше значення запиту ні з чим не збігається і ділить
+        одну таблицю (ключ None), тож кількість таблиць обмежена.
+        """
+        if target_light not in light_labels:
+            target_light = None
+        key = (tuple(light_labels), target_light)
+        table = self._light_tables.get(key)
+        if table is None:
+            table = np.array(
+                [self.light_score(label, target_light) for label in light_labels]
+                + [self.light_score(None, target_light)]
+            )
+            with self._lock:
+                self._light_tables[key] = table
+        return table
+
+    def total(self, drought, biodiversity, growth, recovery, light, soil):
+        """Зважена нормована сума компонентів (скаляри або масиви)"""
+        w_drought, w_biodiversity, w_growth, w_recovery, w_light, w_soil = self.weights
+        return (
+            w_drought * drought
+            + w_biodiversity * biodiversity
+            + w_growth * growth
+            + w_recovery * recovery
+            + w_light * light
+            + w_soil * soil
+        ) / self.normalization
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "weights": dict(zip(COMPONENTS, self.weights)),
+            "light_scores": self.light_scores,
+            "soil_scores": self.soil_scores,
+        }
+
+
+def _merged(name: str, section: str, values: Optional[Dict], defaults: Dict) -> Dict[str, float]:
+    values = values or {}
+    if not isinstance(values, dict):
+        raise ValueError(f"Profile {name!r}: {section} must be an object")
+    unknown = set(values) - set(defaults)
+    if unknown:
+        raise ValueError(
+            f"Profile {name!r}: unknown {section} {', '.join(sorted(unknown))}; "
+            f"expected {', '.join(defaults)}"
+        )
+    merged = dict(defaults)
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f"Profile {name!r}: {section}.{key} must be a non-negative number")
+        merged[key] = float(value)
+    return merged
+
+
+def compile_profile(name: str, spec: Dict) -> ScoringProfile:
+    """Перевіряє опис профілю та компілює його"""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Profile {name!r} must be an object")
+    unknown = set(spec) - {"description", "weights", "light_scores", "soil_scores"}
+    if unknown:
+        raise ValueError(f"Profile {name!r}: unknown keys {', '.join(sorted(unknown))}")
+
+    weights = _merged(name, "weights", spec.get("weights"), DEFAULT_WEIGHTS)
+    if sum(weights.values()) <= 0:
+        raise ValueError(f"Profile {name!r}: at least one weight must be positive")
+    return ScoringProfile(
+        name=name,
+        weights=weights,
+        light_scores=_merged(name, "light_scores", spec.get("light_scores"), DEFAULT_LIGHT_SCORES),
+        soil_scores=_merged(name, "soil_scores", spec.get("soil_scores"), DEFAULT_SOIL_SCORES),
+        description=str(spec.get("description", "")),
+    )
+
+
+def load_profiles(path: Optional[str] = None) -> Dict[str, ScoringProfile]:
+    """Вбудовані профілі та профілі з JSON-файлу path ({назва: опис})"""
+    specs = dict(BUILTIN_PROFILES)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            extra = json.load(f)
+        if not isinstance(extra, dict):
+            raise ValueError(f"{path}: expected an object of named scoring profiles")
+        specs.update(extra)
+    return {name: compile_profile(name, spec) for name, spec in specs.items()}
+
+
+# Профілі компілюються один раз при імпорті; помилка в конфігурації
+# зупиняє старт, а не перший запит
+PROFILES = load_profiles(config.SCORING_PROFILES_PATH)
+if config.SCORING_PROFILE not in PROFILES:
+    raise ValueError(
+        f"Unknown SCORING_PROFILE={config.SCORING_PROFILE!r}, "
+        f"expected one of {', '.join(PROFILES)}"
+    )
+DEFAULT_PROFILE = PROFILES[config.SCORING_PROFILE]
+
+
+def get_profile(name: Optional[str] = None) -> ScoringProfile:
+    """Профіль за назвою (None — SCORING_PROFILE з конфігурації)"""
+    if name is None:
+        return DEFAULT_PROFILE
+    profile = PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown scoring profile {name!r}, expected one of {', '.join(PROFILES)}")
+    return profile
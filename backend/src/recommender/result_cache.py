@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# (catalog_version, explanations_version) — стан даних, з якого зібрано відповідь
+Versions = Tuple[int, int]
+
+
+class ResultCache:
+    """LRU-кеш відповідей /recommend з TTL.
+
+    Записи прив'язані до версій каталогу та кешу пояснень: при зміні
+    будь-якої з них (імпорт, seed, нове AI-пояснення) кеш повністю
+    очищається, тож відповідь з кешу завжди відповідає версіям у її ETag.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[Versions] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, version: Versions) -> Optional[List[Dict]]:
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Копії, щоб виклик не міг змінити збережені результати
+        return [dict(row) for row in entry[1]]
+
+    def put(self, key: Hashable, version: Versions, results: List[Dict]):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._entries[key] = (
+                time.monotonic() + self.ttl,
+                [dict(row) for row in results],
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Видаляє всі записи та прив'язку до версій (наприклад, при зміні БД)"""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "invalidations": self.invalidations,
+                "catalog_version": self._version[0] if self._version else None,
+                "explanations_version": self._version[1] if self._version else None,
+            }
+
+    def _check_version(self, version: Versions) -> bool:
+        """Очищає кеш при новіших версіях; False — якщо версії застаріли"""
+        if self._version is None or version > self._version:
+            if self._version is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+        return version == self._version
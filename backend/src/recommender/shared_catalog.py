@@ -0,0 +1,309 @@
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import pickle
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src import config
+from src.database.catalog_version import get_catalog_version
+from src.database.connection import get_connection
+from src.recommender.catalog import PlantCatalog
+
+logger = logging.getLogger(__name__)
+
+# Формат файлу знімка:
+#   MAGIC | FORMAT_VERSION (u32) | довжина заголовка (u32) | JSON-заголовок
+#   далі секції колонок, вирівняні по ALIGNMENT байт.
+# Заголовок містить дешевий відбиток стану БД, sha256 вмісту рядків,
+# версію каталогу, словники та зміщення/dtype/shape кожної секції.
+MAGIC = b"UPCATSNP"
+FORMAT_VERSION = 3
+PREAMBLE = struct.Struct("<8sII")
+ALIGNMENT = 64
+
+# Числові колонки каталогу (фіксованої ширини)
+NUMERIC_COLUMNS = (
+    "ids",
+    "cold",
+    "drought",
+    "light",
+    "biodiversity",
+    "growth",
+    "recovery",
+    "soil_levels",
+)
+# Рядкові колонки: UTF-8 таблиця рядків + зміщення + маска NULL
+STRING_COLUMNS = ("scientific_names", "common_names", "image_urls")
+
+# Дешевий стан каталогу для перевірки знімка при кожному відкритті:
+# агрегати по ключах (covering-індекси), без читання самих рядків
+STATE_QUERIES = (
+    "SELECT COUNT(*), MAX(id), TOTAL(id) FROM plants",
+    "SELECT COUNT(*), MAX(plant_id), TOTAL(plant_id) FROM plant_traits",
+    "SELECT COUNT(*), MAX(plant_id), TOTAL(plant_id) FROM plant_soil_tolerance",
+)
+
+
+class StringColumn:
+    """Рядкова колонка знімка: рядок i — blob[offsets[i]:offsets[i + 1]]"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray, is_null: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        self.is_null = is_null
+
+    def __len__(self) -> int:
+        return len(self.is_null)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if self.is_null[i]:
+            return None
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+
+def rows_fingerprint(version: int, rows: List[tuple], soil_rows: List[tuple]) -> str:
+    """sha256 версії та всіх рядків, з яких будується каталог"""
+    digest = hashlib.sha256()
+    digest.update(repr(version).encode())
+    digest.update(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+    digest.update(pickle.dumps(soil_rows, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+def db_fingerprint(conn=None) -> str:
+    """Дешевий відбиток стану каталогу: версія та кількість/id рядків таблиць.
+
+    Імпорт, upsert і seed збільшують версію каталогу, тож їхні зміни він
+    помічає завжди; ручну правку вмісту рядків без зміни версії — ні
+    (для неї є --verify, що порівнює content_sha256 з усіма рядками).
+    """
+    conn = conn or get_connection()
+    digest = hashlib.sha256()
+    digest.update(repr(get_catalog_version(conn)).encode())
+    for query in STATE_QUERIES:
+        digest.update(repr(conn.execute(query).fetchone()).encode())
+    return digest.hexdigest()
+
+
+def db_content_sha256(conn=None) -> str:
+    """sha256 усіх рядків каталогу в БД (повний прохід, лише для --verify)"""
+    conn = conn or get_connection()
+    conn.execute("BEGIN")
+    try:
+        version = get_catalog_version(conn)
+        rows, soil_rows = PlantCatalog._fetch_rows(conn.cursor())
+    finally:
+        conn.commit()
+    return rows_fingerprint(version, rows, soil_rows)
+
+
+def _string_sections(values) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    is_null = np.array([value is None for value in values], dtype=bool)
+    return blob, offsets, is_null
+
+
+def write_snapshot(
+    catalog: PlantCatalog,
+    fingerprint: str,
+    path: Optional[str] = None,
+    content_sha256: Optional[str] = None,
+) -> str:
+    """Записує каталог у бінарний знімок (атомарно, через тимчасовий файл)"""
+    path = path or config.CATALOG_SNAPSHOT_PATH
+    sections: Dict[str, np.ndarray] = {
+        name: np.ascontiguousarray(getattr(catalog, name)) for name in NUMERIC_COLUMNS
+    }
+    for name in STRING_COLUMNS:
+        blob, offsets, is_null = _string_sections(getattr(catalog, name))
+        sections[f"{name}.blob"] = blob
+        sections[f"{name}.offsets"] = offsets
+        sections[f"{name}.null"] = is_null
+
+    # Зміщення рахуються від початку області даних, тож не залежать
+    # від довжини самого заголовка
+    layout = {}
+    position = 0
+    for name, array in sections.items():
+        position = _align(position)
+        layout[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": position,
+        }
+        position += array.nbytes
+
+    header = json.dumps(
+        {
+            "fingerprint": fingerprint,
+            "content_sha256": content_sha256,
+            "catalog_version": catalog.version,
+            "light_labels": catalog.light_labels,
+            "soil_codes": catalog.soil_codes,
+            "sections": layout,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    data_start = _align(PREAMBLE.size + len(header))
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, array in sections.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + position)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_snapshot_header(path: Optional[str] = None) -> Optional[Dict]:
+    """Заголовок знімка або None, якщо файлу немає чи формат інший"""
+    path = path or config.CATALOG_SNAPSHOT_PATH
+    try:
+        with open(path, "rb") as f:
+            magic, version, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return None
+            header = json.loads(f.read(header_len).decode("utf-8"))
+    except (OSError, struct.error, ValueError):
+        return None
+    header["data_start"] = _align(PREAMBLE.size + header_len)
+    return header
+
+
+def open_snapshot(path: Optional[str] = None, fingerprint: Optional[str] = None) -> Optional[PlantCatalog]:
+    """Відкриває знімок через mmap без копіювання колонок.
+
+    Повертає None, якщо знімка немає, він пошкоджений або його
+    відбиток не збігається з fingerprint.
+    """
+    path = path or config.CATALOG_SNAPSHOT_PATH
+    header = read_snapshot_header(path)
+    if header is None or (fingerprint is not None and header["fingerprint"] != fingerprint):
+        return None
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def section(name: str) -> np.ndarray:
+        info = header["sections"][name]
+        dtype = np.dtype(info["dtype"])
+        count = int(np.prod(info["shape"], dtype=np.int64))
+        offset = header["data_start"] + info["offset"]
+        if offset + count * dtype.itemsize > size:
+            raise ValueError(f"Пошкоджений знімок каталогу: {path}")
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(info["shape"])
+
+    try:
+        numeric = {name: section(name) for name in NUMERIC_COLUMNS}
+        strings = {
+            name: StringColumn(section(f"{name}.blob"), section(f"{name}.offsets"), section(f"{name}.null"))
+            for name in STRING_COLUMNS
+        }
+    except (KeyError, ValueError) as e:
+        logger.warning("Знімок %s не прочитано: %s", path, e)
+        return None
+
+    return PlantCatalog(
+        light_labels=header["light_labels"],
+        soil_codes=header["soil_codes"],
+        version=header["catalog_version"],
+        **numeric,
+        **strings,
+    )
+
+
+def export_snapshot(path: Optional[str] = None) -> Tuple[PlantCatalog, bool]:
+    """Каталог з актуального знімка; знімок (пере)будується, якщо застарів.
+
+    Повертає (каталог, чи був знімок перебудований). Процеси, що стартують
+    одночасно, чекають на файловий lock, тож каталог з БД читає лише один
+    з них, а решта відкривають готовий знімок.
+    """
+    path = path or config.CATALOG_SNAPSHOT_PATH
+    conn = get_connection()
+    fingerprint = db_fingerprint(conn)
+    catalog = open_snapshot(path, fingerprint)
+    if catalog is not None:
+        return catalog, False
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            catalog = open_snapshot(path, fingerprint)
+            if catalog is not None:
+                return catalog, False
+
+            started = time.perf_counter()
+            # Рядки з БД читає лише процес, що тримає lock; відбиток і дані
+            # беруться з одного знімка БД
+            conn.execute("BEGIN")
+            try:
+                fingerprint = db_fingerprint(conn)
+                version = get_catalog_version(conn)
+                rows, soil_rows = PlantCatalog._fetch_rows(conn.cursor())
+            finally:
+                conn.commit()
+            built = PlantCatalog.from_rows(rows, soil_rows, version=version)
+            write_snapshot(built, fingerprint, path, rows_fingerprint(version, rows, soil_rows))
+            logger.info(
+                "Знімок каталогу v%d (%d рослин) записано в %s за %.2fs",
+                built.version, len(built), path, time.perf_counter() - started,
+            )
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    return open_snapshot(path, fingerprint), True
+
+
+def ensure_shared_catalog(path: Optional[str] = None) -> PlantCatalog:
+    """Каталог процесу для CATALOG_SOURCE=shared"""
+    return export_snapshot(path)[0]
+
+
+def _align(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Export the catalog into the memory-mapped binary snapshot used by API workers"
+    )
+    parser.add_argument("-o", "--output", default=None, help=f"snapshot file (default {config.CATALOG_SNAPSHOT_PATH})")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the snapshot is up to date")
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="hash every catalog row and rebuild if the snapshot content differs (catches manual SQL edits)",
+    )
+    args = parser.parse_args()
+
+    path = args.output or config.CATALOG_SNAPSHOT_PATH
+    if args.verify and os.path.exists(path):
+        header = read_snapshot_header(path)
+        if header is None or header.get("content_sha256") != db_content_sha256():
+            print("Snapshot content differs from the database, rebuilding")
+            args.force = True
+    if args.force and os.path.exists(path):
+        os.remove(path)
+    catalog, rebuilt = export_snapshot(path)
+    print(
+        f"Catalog snapshot v{catalog.version}: {len(catalog)} plants, "
+        f"{os.path.getsize(path) / 1e6:.1f} MB in {path}"
+        + ("" if rebuilt else " (up to date)")
+    )
@@ -1,6 +1,5 @@
-import sqlite3
-
-DB_PATH = "db/urban_plants.db"
+from src.database.catalog_version import bump_catalog_version
+from src.database.connection import get_connection
 
 plants = [
     {
@@ -61,7 +60,7 @@ plants = [
 ]
 
 def seed():
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_connection()
     cur = conn.cursor()
 
     for p in plants:
@@ -98,8 +97,8 @@ def seed():
                 (plant_id, soil)
             )
 
+    bump_catalog_version(conn)
     conn.commit()
-    conn.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src import config
+from src.recommender import engine
+
+SITE = {
+    "soil_code": "chernozem",
+    "min_temp_c": -33,
+    "drought": 1,
+    "light": "shade",
+    "biodiversity": 5,
+    "growth": 2,
+    "recovery": 5,
+    "limit": 5,
+}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # Копія БД: з'єднання вмикає WAL і змінило б робочий файл
+    db_path = tmp_path / "urban_plants.db"
+    shutil.copy(config.DB_PATH, db_path)
+    monkeypatch.setattr(config, "DB_PATH", str(db_path))
+    # Без збережених пояснень і без реальної генерації: результат визначає
+    # лише підмінений generate_explanations
+    monkeypatch.setattr(engine, "get_cached_explanations", lambda keys: {})
+    engine.result_cache.clear()
+    yield TestClient(main.app)
+    engine.result_cache.clear()
+
+
+def test_pending_explanations_are_not_cacheable(client, monkeypatch):
+    monkeypatch.setattr(
+        engine, "generate_explanations",
+        lambda plants, params, timeout: ({}, [plant["id"] for plant in plants]),
+    )
+    response = client.post("/recommend", json=SITE)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+    assert engine.result_cache.stats()["size"] == 0
+
+
+def test_complete_response_revalidates_with_etag(client, monkeypatch):
+    monkeypatch.setattr(engine, "generate_explanations", lambda plants, params, timeout: ({}, []))
+    response = client.post("/recommend", json=SITE)
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public")
+
+    revalidated = client.get("/recommend", params=SITE, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+    other = client.post("/recommend", json={**SITE, "limit": 6}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
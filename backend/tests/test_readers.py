@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from src.importer.readers import iter_json_array
+
+
+def parse(text, chunk_size=1):
+    return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 16])
+def test_parses_objects_across_chunk_boundaries(chunk_size):
+    text = '[ {"id": 12345, "name": "Acer"},\n {"id": 678, "tags": [1, 2]} ]'
+    assert parse(text, chunk_size) == [
+        {"id": 12345, "name": "Acer"},
+        {"id": 678, "tags": [1, 2]},
+    ]
+
+
+@pytest.mark.parametrize("text", ["[]", "  [ ]\n", ""])
+def test_empty(text):
+    assert parse(text) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '[{"a": 1} {"a": 2}]',  # немає коми
+        '[,{"a": 1}]',  # кома на початку
+        '[{"a": 1},,{"a": 2}]',  # подвійна кома
+        '[{"a": 1},]',  # кома в кінці
+        '[{"a": 1}',  # обрізаний файл
+        '[{"a": 1',  # обрізаний елемент
+        '[{"a": 1}] {"a": 2}',  # дані після масиву
+        '{"a": 1}',  # не масив
+    ],
+)
+def test_rejects_malformed_arrays(text):
+    with pytest.raises(ValueError):
+        parse(text)
+
+
+@pytest.mark.parametrize("text", ["[1 2]", "[,1]", "[1,,2]", "[12345, 678]", '[{"a": 1}, "x"]'])
+def test_rejects_non_object_elements(text):
+    with pytest.raises(ValueError):
+        parse(text)
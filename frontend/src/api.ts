@@ -36,13 +36,12 @@ export async function getRecommendations(
     limit: 10,
   };
 
-  const response = await fetch(`${API_BASE}/recommend`, {
-    method: 'POST',
-    headers: {
-      'Content-Type': 'application/json',
-    },
-    body: JSON.stringify(payload),
-  });
+  // GET з параметрами в query-рядку: браузер кешує відповідь і при
+  // повторному запиті надсилає If-None-Match (304 без підрахунку на сервері)
+  const query = new URLSearchParams(
+    Object.entries(payload).map(([key, value]) => [key, String(value)])
+  );
+  const response = await fetch(`${API_BASE}/recommend?${query}`);
 
   if (!response.ok) {
     const text = await response.text();
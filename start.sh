@@ -91,9 +91,19 @@ if [ ! -d "frontend/node_modules" ]; then
 fi
 
 # Запуск бекенду
-info "Запуск бекенду на http://127.0.0.1:8000..."
+# WORKERS=1 (за замовчуванням) — один процес з --reload для розробки,
+# WORKERS>1 — кілька воркерів uvicorn зі спільним mmap-знімком каталогу
+WORKERS=${WORKERS:-1}
+info "Запуск бекенду на http://127.0.0.1:8000 (воркерів: $WORKERS)..."
 cd backend
-uvicorn main:app --reload --host 127.0.0.1 --port 8000 > ../logs/backend.log 2>&1 &
+if [ "$WORKERS" -gt 1 ]; then
+    export CATALOG_SOURCE=shared
+    info "Побудова спільного знімка каталогу..."
+    python -m src.recommender.shared_catalog || { error "Не вдалося побудувати знімок каталогу"; exit 1; }
+    uvicorn main:app --workers "$WORKERS" --host 127.0.0.1 --port 8000 > ../logs/backend.log 2>&1 &
+else
+    uvicorn main:app --reload --host 127.0.0.1 --port 8000 > ../logs/backend.log 2>&1 &
+fi
 BACKEND_PID=$!
 cd ..
 success "Бекенд запущено (PID: $BACKEND_PID)"